@@ -3,6 +3,7 @@ import os
 import logging
 from datetime import datetime
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Load .env if exists
@@ -12,15 +13,17 @@ try:
 except:
     pass
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (set LOG_LEVEL=WARNING in production to silence per-request logs)
+from utils.logging_config import configure_logging
+configure_logging(os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
 # Import routers for full feature support
 from routers import chat, admin
 
 # Create app
-app = FastAPI(title="MyDost API - Production", version="2.0.0")
+# orjson encodes responses (incl. datetimes) straight to bytes, faster than stdlib json
+app = FastAPI(title="MyDost API - Production", version="2.0.0", default_response_class=ORJSONResponse)
 
 # Add CORS - allow all origins for testing
 app.add_middleware(
@@ -93,8 +96,32 @@ async def startup_event():
     else:
         logger.info("ℹ️ Web search not configured")
     
+    # Load and warm the embedding model in the background so the first user doesn't pay for it
+    if os.getenv("EMBEDDING_WARMUP", "true").lower() == "true":
+        from services.embedding_service import embedding_service
+        embedding_service.start_warmup()
+        logger.info("🔥 Embedding model warmup started")
+    
     logger.info("=" * 50)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled outbound HTTP connections and document worker processes"""
+    from services.duckduckgo_search import duckduckgo_search
+    from services.image_edit_service import image_edit_service
+    from services.llm_service import llm_service
+    from services.news_service import news_service
+    from services.scrape_service import scrape_service
+    from services.search_service import search_service
+    from services import OCR_POOL
+    await duckduckgo_search.close()
+    await image_edit_service.close()
+    await llm_service.close()
+    await news_service.close()
+    await scrape_service.close()
+    await search_service.close()
+    OCR_POOL.shutdown(wait=False, cancel_futures=True)
+
 # ============= ERROR HANDLER =============
 
 @app.exception_handler(Exception)
@@ -0,0 +1,11 @@
+-- Migration: Index chat_vectors for per-user memory_type filters
+-- Run this in your Railway PostgreSQL database (also applied on startup by VectorStoreService)
+
+-- Tiny partial index for the common type = 'conversation' listing
+CREATE INDEX IF NOT EXISTS chat_vectors_user_conv_time_idx
+  ON chat_vectors(user_id, created_at DESC)
+  WHERE type = 'conversation';
+
+-- Covers type filters on the remaining memory types (note, document, knowledge, ...)
+CREATE INDEX IF NOT EXISTS chat_vectors_user_type_time_idx
+  ON chat_vectors(user_id, type, created_at DESC);
@@ -1,8 +1,9 @@
 """Chat API routes for conversational interaction."""
-from fastapi import APIRouter, HTTPException, Body, Request
+from fastapi import APIRouter, HTTPException, Body, Request, BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, Tuple
 import uuid
+import asyncio
 from datetime import datetime
 import re
 import psycopg2
@@ -21,13 +22,22 @@ from utils.language_detect import detect_language, translate_system_message
 from utils.cache import get_cached_response, cache_query_response, get_cached_search_results, get_web_search_count, increment_web_search_count
 from urllib.parse import urlparse
 import psycopg2
+from psycopg2 import errors
 from psycopg2.extras import RealDictCursor
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 predictions_db = PredictionsDB()  # Initialize predictions cache
 in_memory_profiles: Dict[str, Dict[str, Any]] = {}  # fallback when DB not available
 in_memory_names: Dict[str, str] = {}  # quick name recall when DB unavailable
 CONV_TABLE_READY = False
+EMBED_INPUT_MAX_CHARS = 512  # ~128 tokens, the embedding model's max sequence length
+PERSIST_SEMAPHORE = asyncio.Semaphore(8)  # bound concurrent background memory saves
+# Vector-store tables holding a user's data; any may be missing (pdf_documents is never
+# created when the pgvector extension is unavailable)
+USER_DATA_TABLES = ("chat_vectors", "pdf_documents", "user_profiles")
 
 
 def _ensure_conv_table():
@@ -479,7 +489,8 @@ async def learn_user_preferences(
             # Persist for logged-in users
             if not user_id.startswith("guest_"):
                 try:
-                    vector_store.update_user_profile(
+                    await asyncio.to_thread(
+                        vector_store.update_user_profile,
                         user_id=user_id,
                         preferences=preferences,
                         interests=list(set(interests)),  # Remove duplicates
@@ -977,7 +988,6 @@ async def get_web_search_context(query: str, is_sports_query: bool = False, user
     base_query = enhance_sports_query(query) if is_sports_query else query
     search_query = refine_search_query(base_query, is_sports_query=is_sports_query)
     try:
-        import asyncio
         search_results = await asyncio.wait_for(
             search_service.async_search(search_query, limit=8, ttl=ttl_seconds),
             timeout=6.0
@@ -1230,8 +1240,90 @@ def refine_search_query(message: str, is_sports_query: bool = False) -> str:
     return trimmed
 
 
+async def _persist_turn(
+    user_id: str,
+    conversation_id: str,
+    message: str,
+    response_text: str,
+    detected_language: str,
+):
+    """Store both user message AND assistant response for full conversation memory."""
+    async with PERSIST_SEMAPHORE:
+        try:
+            # Only store for logged-in users (not guests) and skip trivial greetings
+            if user_id.startswith("guest_") or is_simple_greeting(message):
+                logger.debug("⏭️ Skipping vector storage for guest user")
+                return
+            
+            logger.debug("💾 Storing conversation to vector DB for user: %s", user_id)
+            
+            # 🎯 DETECT PERSONAL INFORMATION in user message
+            msg_lower = message.lower()
+            is_personal_info = any(phrase in msg_lower for phrase in [
+                'my name is', 'i am', "i'm", 'call me', 'remember', 
+                'dont forget', "don't forget", 'my birthday', 'i live in',
+                'my age', 'years old', 'my job', 'i work'
+            ])
+            
+            asst_snippet = response_text[:800]  # Truncate long responses
+            message_embedding, response_embedding = await asyncio.gather(
+                embedding_service.embed_text(message[:EMBED_INPUT_MAX_CHARS]),
+                embedding_service.embed_text(asst_snippet),
+            )
+            
+            # 1. Store user message (psycopg2 blocks, so the inserts run in a thread)
+            await asyncio.to_thread(
+                vector_store.add_memory,
+                user_id=user_id,
+                content=f"User said: {message}",
+                embedding=message_embedding,
+                conversation_id=conversation_id,
+                memory_type="conversation",
+                metadata={
+                    "role": "user",
+                    "language": detected_language,
+                    "timestamp": datetime.now().isoformat(),
+                    "is_personal_info": is_personal_info,  # Flag for priority retrieval
+                }
+            )
+            
+            if is_personal_info:
+                logger.debug("🎯 Detected personal information - flagged for priority retrieval")
+            
+            # 2. Store assistant response (for context in future queries)
+            await asyncio.to_thread(
+                vector_store.add_memory,
+                user_id=user_id,
+                content=f"MyDost replied: {asst_snippet}",
+                embedding=response_embedding,
+                conversation_id=conversation_id,
+                memory_type="conversation",
+                metadata={
+                    "role": "assistant",
+                    "language": detected_language,
+                    "timestamp": datetime.now().isoformat(),
+                    "query": message[:200],  # Store what triggered this response
+                }
+            )
+            
+            logger.info("✅ Conversation stored: user message + assistant response")
+            
+            # 🧠 LEARN USER PREFERENCES AND INTERESTS
+            # Extract and store preferences from conversation
+            await learn_user_preferences(
+                user_id=user_id,
+                message=message,
+                response=response_text,
+                detected_language=detected_language
+            )
+        
+        except Exception as e:
+            logger.warning("⚠️ Error storing conversation memory: %s", e)
+            # Don't fail anything else if storage fails
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, http_request: Request):
+async def chat(request: ChatRequest, http_request: Request, background_tasks: BackgroundTasks):
     """
     Send a chat message and get a response.
     
@@ -1248,7 +1340,7 @@ async def chat(request: ChatRequest, http_request: Request):
             user_agent = http_request.headers.get("user-agent", "unknown")
             ip = http_request.headers.get("x-forwarded-for", http_request.client.host if http_request.client else "unknown").split(",")[0]
             request.user_id = f"guest_{config.get_client_fingerprint(user_agent, ip)}"
-            print(f"🆔 Assigned fallback guest user_id: {request.user_id}")
+            logger.debug("🆔 Assigned fallback guest user_id: %s", request.user_id)
         
         # Merge transient preferences sent by client (tone, language, interests)
         if request.preferences:
@@ -1268,7 +1360,7 @@ async def chat(request: ChatRequest, http_request: Request):
                         increment_messages=False
                     )
                 except Exception as e:
-                    print(f"⚠️ Could not sync preferences to vector store: {e}")
+                    logger.warning("⚠️ Could not sync preferences to vector store: %s", e)
         
         # Check free limits if enabled and user is guest/anonymous
         if config.ENABLE_FREE_LIMITS and (request.user_id == "anonymous-user" or request.user_id.startswith("guest_") or request.user_id.startswith("guest-")):
@@ -1364,9 +1456,9 @@ async def chat(request: ChatRequest, http_request: Request):
                             Message(role=row["role"], content=row["content"])
                         )
                     if rows:
-                        print(f"✅ Loaded {len(rows)} messages for conversation {conversation_id}")
+                        logger.debug("✅ Loaded %d messages for conversation %s", len(rows), conversation_id)
                 except Exception as e:
-                    print(f"⚠️ Could not load conversation history for {conversation_id}: {e}")
+                    logger.warning("⚠️ Could not load conversation history for %s: %s", conversation_id, e)
         
         conversation = conversations[conversation_id]
         
@@ -1431,7 +1523,7 @@ async def chat(request: ChatRequest, http_request: Request):
             # Check web search rate limits before allowing search
             can_use_web_search = False
             if search_needed:
-                print(f"🔍 Web search triggered: include_web_search={request.include_web_search}, auto_search={auto_search}, sports_context={bool(sports_context)}")
+                logger.debug("🔍 Web search triggered: include_web_search=%s, auto_search=%s, sports_context=%s", request.include_web_search, auto_search, bool(sports_context))
                 
                 # Get user subscription status if available
                 user_subscription = None
@@ -1455,7 +1547,7 @@ async def chat(request: ChatRequest, http_request: Request):
                 cached_exists = get_cached_search_results(request.message)
                 if cached_exists or current_count < daily_limit:
                     can_use_web_search = True
-                    print(f"✅ Web search ALLOWED: cached={bool(cached_exists)}, count={current_count}/{daily_limit}")
+                    logger.debug("✅ Web search ALLOWED: cached=%s, count=%s/%s", bool(cached_exists), current_count, daily_limit)
                     if not cached_exists:  # Only increment if actually searching
                         increment_web_search_count(request.user_id)
                 else:
@@ -1608,72 +1700,15 @@ When answering about sports/cricket/matches:
         conversation.updated_at = datetime.now().isoformat()
         
         # 💾 AUTO-SAVE TO VECTOR DB FOR PERSISTENT MEMORY
-        # Store both user message AND assistant response for full conversation memory
-        try:
-            # Only store for logged-in users (not guests) and skip trivial greetings
-            if not request.user_id.startswith("guest_") and not is_simple_greeting(request.message):
-                print(f"💾 Storing conversation to vector DB for user: {request.user_id}")
-                
-                # 🎯 DETECT PERSONAL INFORMATION in user message
-                msg_lower = request.message.lower()
-                is_personal_info = any(phrase in msg_lower for phrase in [
-                    'my name is', 'i am', "i'm", 'call me', 'remember', 
-                    'dont forget', "don't forget", 'my birthday', 'i live in',
-                    'my age', 'years old', 'my job', 'i work'
-                ])
-                
-                # 1. Store user message
-                message_embedding = await embedding_service.embed_text(request.message)
-                vector_store.add_memory(
-                    user_id=request.user_id,
-                    content=f"User said: {request.message}",
-                    embedding=message_embedding,
-                    conversation_id=conversation_id,
-                    memory_type="conversation",
-                    metadata={
-                        "role": "user",
-                        "language": detected_language,
-                        "timestamp": datetime.now().isoformat(),
-                        "is_personal_info": is_personal_info,  # Flag for priority retrieval
-                    }
-                )
-                
-                if is_personal_info:
-                    print(f"🎯 Detected personal information - flagged for priority retrieval")
-                
-                # 2. Store assistant response (for context in future queries)
-                response_embedding = await embedding_service.embed_text(response_text)
-                vector_store.add_memory(
-                    user_id=request.user_id,
-                    content=f"MyDost replied: {response_text[:800]}",  # Truncate long responses
-                    embedding=response_embedding,
-                    conversation_id=conversation_id,
-                    memory_type="conversation",
-                    metadata={
-                        "role": "assistant",
-                        "language": detected_language,
-                        "timestamp": datetime.now().isoformat(),
-                        "query": request.message[:200],  # Store what triggered this response
-                    }
-                )
-                
-                print(f"✅ Conversation stored: user message + assistant response")
-                
-                # 🧠 LEARN USER PREFERENCES AND INTERESTS
-                # Extract and store preferences from conversation
-                await learn_user_preferences(
-                    user_id=request.user_id,
-                    message=request.message,
-                    response=response_text,
-                    detected_language=detected_language
-                )
-                
-            else:
-                print(f"⏭️ Skipping vector storage for guest user")
-                
-        except Exception as e:
-            print(f"⚠️ Error storing conversation memory: {e}")
-            # Don't fail the request if storage fails
+        # Runs after the response is sent so embedding + inserts don't add latency
+        background_tasks.add_task(
+            _persist_turn,
+            user_id=request.user_id,
+            conversation_id=conversation_id,
+            message=request.message,
+            response_text=response_text,
+            detected_language=detected_language,
+        )
         
         # Track usage in database per user (disabled for testing)
         # user_db.increment_usage(
@@ -1697,7 +1732,7 @@ When answering about sports/cricket/matches:
         )
     
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
+        logger.error("Error in chat endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1828,22 +1863,36 @@ async def delete_conversations(user_id: str, confirm: bool = False):
         raise HTTPException(status_code=400, detail="Set confirm=true to delete all conversations.")
     deleted_conv = 0
     deleted_vectors = 0
+    missing_tables = []
     try:
         _ensure_conv_table()
+        # Chat history and vector memories are cleared in one transaction on one connection
         conn = psycopg2.connect(config.DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute("DELETE FROM conversation_messages WHERE user_id = %s", (user_id,))
-        deleted_conv = cur.rowcount
-        conn.commit()
-        cur.close()
-        conn.close()
-    except Exception as e:
-        print(f"⚠️ Error deleting conversation_messages: {e}")
-    try:
-        # Also clear vector DB entries for this user to keep state aligned
-        vector_store.delete_user_data(user_id)
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("DELETE FROM conversation_messages WHERE user_id = %s", (user_id,))
+                deleted_conv = cur.rowcount
+                for table in USER_DATA_TABLES:
+                    # A savepoint per table, so a missing one doesn't roll back the others
+                    cur.execute("SAVEPOINT user_data")
+                    try:
+                        cur.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+                    except errors.UndefinedTable:
+                        cur.execute("ROLLBACK TO SAVEPOINT user_data")
+                        missing_tables.append(table)
+                        continue
+                    if table == "chat_vectors":
+                        deleted_vectors = cur.rowcount
+                    cur.execute("RELEASE SAVEPOINT user_data")
+        finally:
+            conn.close()
     except Exception as e:
-        print(f"⚠️ Error deleting user data from vector store: {e}")
+        logger.warning("⚠️ Error deleting user conversations: %s", e)
+        raise HTTPException(status_code=500, detail="Could not delete conversations")
+    
+    if missing_tables:
+        logger.warning("⚠️ Missing tables while deleting user data: %s", ", ".join(missing_tables))
+        vector_store.ensure_tables_exist()
     return {"deleted_conversation_messages": deleted_conv, "deleted_vectors": deleted_vectors}
 
 @router.delete("/conversations/{conversation_id}")
@@ -2221,8 +2270,16 @@ async def search_memories(
         date_from: ISO date string (e.g., "2026-01-01") - optional
         date_to: ISO date string - optional
     """
+    # Parse dates once up front so bad input is a 400 and Postgres gets real timestamps
     try:
-        query_embedding = await embedding_service.embed_text(query)
+        dt_from = datetime.fromisoformat(date_from) if date_from else None
+        dt_to = datetime.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date_from/date_to must be ISO dates (e.g. 2026-01-01)")
+    
+    try:
+        # Plain list: this ad-hoc connection has no pgvector adapter registered
+        query_embedding = await embedding_service.embed_text_list(query)
         
         conn = psycopg2.connect(config.DATABASE_URL)
         cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -2241,13 +2298,13 @@ async def search_memories(
         """
         params = [query_embedding, user_id]
         
-        if date_from:
+        if dt_from:
             sql_query += " AND created_at >= %s"
-            params.append(date_from)
+            params.append(dt_from)
         
-        if date_to:
+        if dt_to:
             sql_query += " AND created_at <= %s"
-            params.append(date_to)
+            params.append(dt_to)
         
         sql_query += " ORDER BY similarity DESC LIMIT %s"
         params.append(limit)
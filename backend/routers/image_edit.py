@@ -4,12 +4,24 @@ from typing import Optional, Tuple
 import os
 import tempfile
 import base64
+from PIL import Image
 from services.image_edit_service import image_edit_service
 from utils.config import config
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _save_upload(content: bytes) -> Tuple[str, str]:
+    """Write an upload to a temp file named for its output format; returns (path, format)."""
+    fmt = image_edit_service.output_format_of(content)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt.lower()}") as tmp:
+        tmp.write(content)
+    return tmp.name, fmt
+
+
 @router.post("/image/crop")
 async def crop_image(
     file: UploadFile = File(...),
@@ -26,12 +38,10 @@ async def crop_image(
         
         content = await file.read()
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        tmp_path, fmt = _save_upload(content)
         
         try:
-            cropped = image_edit_service.crop(tmp_path, x, y, width, height)
+            cropped = await image_edit_service.acrop(tmp_path, x, y, width, height, output_format=fmt)
             
             if not cropped:
                 raise HTTPException(status_code=400, detail="Failed to crop image")
@@ -42,16 +52,20 @@ async def crop_image(
                 "success": True,
                 "image": base64.b64encode(cropped).decode(),
                 "format": "base64",
+                "mime_type": Image.MIME[fmt],
                 "operation": "crop",
             }
         
         finally:
-            if os.path.exists(tmp_path):
+            try:
                 os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
     
     except HTTPException:
         raise
     except Exception as e:
+        logger.error("Error in image crop: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -69,17 +83,15 @@ async def enhance_image(
         
         content = await file.read()
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        tmp_path, fmt = _save_upload(content)
         
         try:
             if operation == "brightness":
-                enhanced = image_edit_service.enhance_brightness(tmp_path, factor)
+                enhanced = await image_edit_service.aenhance_brightness(tmp_path, factor, output_format=fmt)
             elif operation == "contrast":
-                enhanced = image_edit_service.enhance_contrast(tmp_path, factor)
+                enhanced = await image_edit_service.aenhance_contrast(tmp_path, factor, output_format=fmt)
             elif operation == "sharpness":
-                enhanced = image_edit_service.enhance_sharpness(tmp_path, factor)
+                enhanced = await image_edit_service.aenhance_sharpness(tmp_path, factor, output_format=fmt)
             else:
                 raise HTTPException(status_code=400, detail="Unknown operation")
             
@@ -92,17 +104,21 @@ async def enhance_image(
                 "success": True,
                 "image": base64.b64encode(enhanced).decode(),
                 "format": "base64",
+                "mime_type": Image.MIME[fmt],
                 "operation": operation,
                 "factor": factor,
             }
         
         finally:
-            if os.path.exists(tmp_path):
+            try:
                 os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
     
     except HTTPException:
         raise
     except Exception as e:
+        logger.error("Error in image enhancement: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -121,12 +137,10 @@ async def annotate_image(
         
         content = await file.read()
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        tmp_path, fmt = _save_upload(content)
         
         try:
-            annotated = image_edit_service.annotate_text(tmp_path, text, x, y)
+            annotated = await image_edit_service.aannotate_text(tmp_path, text, x, y, output_format=fmt)
             
             if not annotated:
                 raise HTTPException(status_code=400, detail="Failed to annotate image")
@@ -137,17 +151,21 @@ async def annotate_image(
                 "success": True,
                 "image": base64.b64encode(annotated).decode(),
                 "format": "base64",
+                "mime_type": Image.MIME[fmt],
                 "operation": "annotate",
                 "text": text,
             }
         
         finally:
-            if os.path.exists(tmp_path):
+            try:
                 os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
     
     except HTTPException:
         raise
     except Exception as e:
+        logger.error("Error in image annotation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
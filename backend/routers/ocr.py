@@ -6,9 +6,15 @@ import tempfile
 from services.ocr_service import ocr_service
 from models.user import user_db
 from utils.config import config
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_ALLOWED_TYPES = frozenset({"image/jpeg", "image/png", "image/tiff", "image/webp"})
+_ALLOWED_LANGS = frozenset({"eng", "hin", "asm", "ben"})  # combinable as e.g. "eng+hin"
+
 
 @router.post("/ocr")
 async def process_ocr(
@@ -43,11 +49,17 @@ async def process_ocr(
             )
         
         # Validate file type
-        allowed_types = {"image/jpeg", "image/png", "image/tiff", "image/webp"}
-        if file.content_type not in allowed_types:
+        if file.content_type not in _ALLOWED_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type {file.content_type} not supported. Allowed: {sorted(_ALLOWED_TYPES)}"
+            )
+        
+        # Validate language before writing anything to disk
+        if not _ALLOWED_LANGS.issuperset(language.split("+")):
             raise HTTPException(
                 status_code=400,
-                detail=f"File type {file.content_type} not supported. Allowed: {allowed_types}"
+                detail=f"Language {language} not supported. Allowed: {sorted(_ALLOWED_LANGS)}"
             )
         
         # Save temporary file
@@ -58,7 +70,8 @@ async def process_ocr(
         
         try:
             # Extract text
-            text = ocr_service.extract_text(tmp_path, language=language)
+            # Recognition runs in an OCR_POOL worker process (document_workers.extract_image_text); the cache is checked here
+            text = (await ocr_service.extract_text_async([tmp_path], language=language))[0]
             
             if not text:
                 raise HTTPException(
@@ -79,13 +92,15 @@ async def process_ocr(
         
         finally:
             # Clean up
-            if os.path.exists(tmp_path):
+            try:
                 os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in OCR processing: {str(e)}")
+        logger.error("Error in OCR processing: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1,17 +1,62 @@
 """Payment and subscription management with Razorpay."""
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Optional
 import razorpay
+import requests
+from requests.adapters import HTTPAdapter
+import anyio.to_thread
 import hmac
-import hashlib
+import logging
+import orjson
 from models.user import user_db
 from utils.config import config
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(config.RAZORPAY_KEY_ID, config.RAZORPAY_KEY_SECRET))
+# Initialize Razorpay client on a pooled keep-alive session so API calls reuse TCP/TLS connections
+_rzp_session = requests.Session()
+_rzp_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+razorpay_client = razorpay.Client(session=_rzp_session, auth=(config.RAZORPAY_KEY_ID, config.RAZORPAY_KEY_SECRET))
+
+# Signing key encoded once; hmac.digest runs the whole HMAC in OpenSSL
+_RZP_KEY_BYTES = config.RAZORPAY_KEY_SECRET.encode()
+
+_PLANS = config.SUBSCRIPTION_PLANS
+_FREE_PLAN = _PLANS['free']
+
+# Razorpay plan id and charge amount (paise) for each purchasable plan
+_SUB_META = {
+    p: {"plan_id": f"plan_{p}", "amount_paise": _PLANS[p]['price'] * 100}
+    for p in ('limited', 'unlimited')
+}
+
+# Plans are static config, so the /subscription/plans body is rendered once at import
+_PLANS_PAYLOAD = {
+    "plans": [
+        {
+            "id": "limited",
+            "name": _PLANS['limited']['name'],
+            "price": _PLANS['limited']['price'],
+            "currency": "INR",
+            "messages_per_day": _PLANS['limited']['messages_per_day'],
+            "features": _PLANS['limited']['features'],
+            "duration": "monthly"
+        },
+        {
+            "id": "unlimited",
+            "name": _PLANS['unlimited']['name'],
+            "price": _PLANS['unlimited']['price'],
+            "currency": "INR",
+            "messages_per_day": "Unlimited",
+            "features": _PLANS['unlimited']['features'],
+            "duration": "monthly"
+        }
+    ]
+}
+_PLANS_BYTES = orjson.dumps(_PLANS_PAYLOAD)
 
 class CreateSubscriptionRequest(BaseModel):
     user_id: str
@@ -27,41 +72,19 @@ class VerifyPaymentRequest(BaseModel):
 @router.get("/subscription/plans")
 async def get_subscription_plans():
     """Get all available subscription plans."""
-    return {
-        "plans": [
-            {
-                "id": "limited",
-                "name": config.SUBSCRIPTION_PLANS['limited']['name'],
-                "price": config.SUBSCRIPTION_PLANS['limited']['price'],
-                "currency": "INR",
-                "messages_per_day": config.SUBSCRIPTION_PLANS['limited']['messages_per_day'],
-                "features": config.SUBSCRIPTION_PLANS['limited']['features'],
-                "duration": "monthly"
-            },
-            {
-                "id": "unlimited",
-                "name": config.SUBSCRIPTION_PLANS['unlimited']['name'],
-                "price": config.SUBSCRIPTION_PLANS['unlimited']['price'],
-                "currency": "INR",
-                "messages_per_day": "Unlimited",
-                "features": config.SUBSCRIPTION_PLANS['unlimited']['features'],
-                "duration": "monthly"
-            }
-        ]
-    }
+    return Response(content=_PLANS_BYTES, media_type="application/json")
 
 @router.post("/subscription/create")
-async def create_subscription(request: CreateSubscriptionRequest):
+def create_subscription(request: CreateSubscriptionRequest):
     """Create a Razorpay subscription."""
     try:
-        if request.plan not in ['limited', 'unlimited']:
+        meta = _SUB_META.get(request.plan)
+        if meta is None:
             raise HTTPException(status_code=400, detail="Invalid plan")
         
-        plan_details = config.SUBSCRIPTION_PLANS[request.plan]
-        
         # Create Razorpay subscription
         subscription_data = {
-            "plan_id": f"plan_{request.plan}",  # You need to create these in Razorpay dashboard
+            "plan_id": meta["plan_id"],  # You need to create these in Razorpay dashboard
             "total_count": 12,  # 12 months
             "quantity": 1,
             "customer_notify": 1,
@@ -76,26 +99,32 @@ async def create_subscription(request: CreateSubscriptionRequest):
         return {
             "subscription_id": subscription['id'],
             "plan": request.plan,
-            "amount": plan_details['price'] * 100,  # Convert to paise
+            "amount": meta["amount_paise"],
             "currency": "INR",
             "razorpay_key": config.RAZORPAY_KEY_ID
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/subscription/verify")
-async def verify_payment(request: VerifyPaymentRequest):
+def verify_payment(request: VerifyPaymentRequest):
     """Verify Razorpay payment and activate subscription."""
     try:
-        # Verify signature
-        generated_signature = hmac.new(
-            config.RAZORPAY_KEY_SECRET.encode(),
+        # Verify signature (constant-time compare of the raw 32-byte digests)
+        expected = hmac.digest(
+            _RZP_KEY_BYTES,
             f"{request.razorpay_payment_id}|{request.razorpay_subscription_id}".encode(),
-            hashlib.sha256
-        ).hexdigest()
+            "sha256"
+        )
+        try:
+            provided = bytes.fromhex(request.razorpay_signature)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid payment signature")
         
-        if generated_signature != request.razorpay_signature:
+        if not hmac.compare_digest(expected, provided):
             raise HTTPException(status_code=400, detail="Invalid payment signature")
         
         # Upgrade user subscription
@@ -128,8 +157,9 @@ async def razorpay_webhook(request: Request):
         webhook_signature = request.headers.get("X-Razorpay-Signature")
         webhook_body = await request.body()
         
-        # Verify webhook
-        razorpay_client.utility.verify_webhook_signature(
+        # Verify webhook (HMAC over the body) off the event loop
+        await anyio.to_thread.run_sync(
+            razorpay_client.utility.verify_webhook_signature,
             webhook_body.decode(),
             webhook_signature,
             config.RAZORPAY_WEBHOOK_SECRET
@@ -154,12 +184,12 @@ async def razorpay_webhook(request: Request):
         
         return {"status": "success"}
         
-    except Exception as e:
-        print(f"Webhook error: {str(e)}")
+    except Exception:
+        logger.warning("Webhook error", exc_info=True)
         raise HTTPException(status_code=400, detail="Webhook verification failed")
 
 @router.get("/subscription/status/{user_id}")
-async def get_subscription_status(user_id: str):
+def get_subscription_status(user_id: str):
     """Get user's current subscription status."""
     try:
         user = user_db.get_user(user_id)
@@ -167,7 +197,7 @@ async def get_subscription_status(user_id: str):
             raise HTTPException(status_code=404, detail="User not found")
         
         tier = user.get('subscription_tier', 'free')
-        plan = config.SUBSCRIPTION_PLANS.get(tier, config.SUBSCRIPTION_PLANS['free'])
+        plan = _PLANS.get(tier, _FREE_PLAN)
         
         return {
             "user_id": user_id,
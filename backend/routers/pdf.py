@@ -1,13 +1,28 @@
 """PDF API routes for document processing."""
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form
 import os
+import logging
 import tempfile
+import anyio.to_thread
 from services.pdf_service import pdf_service
 from models.user import user_db
 from utils.config import config
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+MAX_PDF_BYTES = 50 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _unlink_quiet(path: str):
+    """Remove a temp file with a single syscall, ignoring it if already gone."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
 
 @router.post("/pdf/upload")
 async def upload_pdf(
@@ -41,22 +56,24 @@ async def upload_pdf(
                 detail="File must be a PDF"
             )
         
-        # Validate file size (max 50MB)
-        content = await file.read()
-        if len(content) > 50 * 1024 * 1024:
-            raise HTTPException(
-                status_code=413,
-                detail="PDF file too large (max 50MB)"
-            )
-        
-        # Save temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        # Stream the upload to disk, enforcing the size limit as bytes arrive
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+        tmp_path = tmp.name
         
         try:
-            # Process PDF
-            result = pdf_service.process_pdf(
+            total = 0
+            with tmp:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    total += len(chunk)
+                    if total > MAX_PDF_BYTES:
+                        raise HTTPException(
+                            status_code=413,
+                            detail="PDF file too large (max 50MB)"
+                        )
+                    tmp.write(chunk)
+            
+            # Process PDF (extraction in a worker process, embedding in a thread)
+            result = await pdf_service.process_pdf_async(
                 file_path=tmp_path,
                 user_id=user_id,
                 document_name=document_name
@@ -72,18 +89,17 @@ async def upload_pdf(
         
         finally:
             # Clean up
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+            await anyio.to_thread.run_sync(_unlink_quiet, tmp_path)
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in PDF processing: {str(e)}")
+        logger.warning("Error in PDF processing", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/pdf/info")
-async def get_pdf_info():
+def get_pdf_info():
     """Get PDF processing information."""
     return {
         "max_file_size": "50MB",
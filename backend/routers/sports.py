@@ -3,6 +3,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+import asyncio
+import threading
+import time
 
 from services.sports_service import sports_service
 from services.teer_service import teer_service
@@ -10,6 +13,63 @@ from models.sports_data import sports_db
 
 router = APIRouter()
 
+_now_cache = [0, ""]  # [epoch second, ISO string] reused within the same second
+
+
+def _iso_now_cached() -> str:
+    """Response timestamp at one-second granularity, formatted once per second."""
+    now = int(time.time())
+    if now != _now_cache[0]:
+        _now_cache[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _now_cache[1]
+
+
+UPCOMING_MATCHES_TTL = 60  # seconds; fixtures change on the order of minutes
+_matches_lock = threading.Lock()
+_matches_cache = (0.0, [], {})  # (loaded_at, matches, {(team_a, team_b): match})
+
+
+def _get_upcoming_matches_cached():
+    """
+    Upcoming matches for the next 7 days, reloaded from the DB at most once per TTL.
+    
+    Returns:
+        (matches ordered by date, dict of lowercased team pair -> earliest match in both orders)
+    """
+    global _matches_cache
+    loaded_at, matches, by_pair = _matches_cache
+    if time.monotonic() - loaded_at < UPCOMING_MATCHES_TTL:
+        return matches, by_pair
+    
+    with _matches_lock:
+        # Another thread may have refreshed while we waited for the lock
+        loaded_at, matches, by_pair = _matches_cache
+        if time.monotonic() - loaded_at < UPCOMING_MATCHES_TTL:
+            return matches, by_pair
+        
+        matches = sports_db.get_upcoming_matches(days_ahead=7)
+        by_pair = {}
+        for match in matches:
+            a, b = match["team_1"].lower(), match["team_2"].lower()
+            by_pair.setdefault((a, b), match)
+            by_pair.setdefault((b, a), match)
+        _matches_cache = (time.monotonic(), matches, by_pair)
+        return matches, by_pair
+
+
+def _find_upcoming_match(t1: str, t2: str) -> Optional[dict]:
+    """Earliest upcoming match involving both (lowercased) teams, exact names first."""
+    matches, by_pair = _get_upcoming_matches_cached()
+    match = by_pair.get((t1, t2))
+    if match is not None:
+        return match
+    # Partial names ("csk" in "csk chennai") fall back to a scan of the cached list
+    for m in matches:
+        names = (m["team_1"].lower(), m["team_2"].lower())
+        if any(t1 in n for n in names) and any(t2 in n for n in names):
+            return m
+    return None
+
 
 # ============= PYDANTIC MODELS =============
 
@@ -47,21 +107,21 @@ class UserSportsProfileRequest(BaseModel):
 # ============= MATCH ENDPOINTS =============
 
 @router.get("/sports/upcoming-matches")
-async def get_upcoming_matches():
+def get_upcoming_matches():
     """Get all upcoming matches from database."""
     try:
         data = sports_service.get_upcoming_matches_with_context()
         return {
             "success": True,
             "data": data,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/sports/predict-match")
-async def predict_match(request: MatchPredictionRequest):
+def predict_match(request: MatchPredictionRequest):
     """Predict match outcome with user memory consideration."""
     try:
         prediction = sports_service.predict_match_with_user_memory(
@@ -73,32 +133,24 @@ async def predict_match(request: MatchPredictionRequest):
         return {
             "success": True,
             "prediction": prediction,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/sports/save-prediction")
-async def save_prediction(request: MatchPredictionRequest):
+def save_prediction(request: MatchPredictionRequest):
     """Save user's match prediction to database."""
     try:
-        # Get upcoming matches for the teams
-        matches = sports_db.get_upcoming_matches(days_ahead=7)
-        
-        # Find matching teams
-        relevant_matches = [
-            m for m in matches
-            if (request.team_1.lower() in m.get("team_1", "").lower() or 
-                request.team_1.lower() in m.get("team_2", "").lower()) and
-               (request.team_2.lower() in m.get("team_1", "").lower() or 
-                request.team_2.lower() in m.get("team_2", "").lower())
-        ]
+        # Look the teams up in the TTL-cached upcoming matches
+        t1, t2 = request.team_1.lower(), request.team_2.lower()
+        match = _find_upcoming_match(t1, t2)
         
-        if not relevant_matches:
+        if match is None:
             raise HTTPException(status_code=404, detail="No upcoming matches found for these teams")
         
-        match_id = relevant_matches[0]["match_id"]
+        match_id = match["match_id"]
         prediction_text = f"Prediction for {request.team_1} vs {request.team_2}"
         
         pred_id = sports_service.save_match_prediction(
@@ -111,21 +163,23 @@ async def save_prediction(request: MatchPredictionRequest):
             "success": True,
             "prediction_id": pred_id,
             "message": "Prediction saved successfully",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/sports/profile/{user_id}")
-async def get_sports_profile(user_id: str):
+def get_sports_profile(user_id: str):
     """Get user's sports prediction profile and history."""
     try:
         profile = sports_service.get_user_sports_profile(user_id)
         return {
             "success": True,
             "profile": profile,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -134,21 +188,21 @@ async def get_sports_profile(user_id: str):
 # ============= TEER ENDPOINTS =============
 
 @router.get("/teer/results")
-async def get_teer_results():
+def get_teer_results():
     """Get teer results with pattern analysis."""
     try:
         data = teer_service.get_teer_with_pattern_analysis()
         return {
             "success": True,
             "data": data,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/teer/predict")
-async def predict_teer(request: TeerPredictionRequest):
+def predict_teer(request: TeerPredictionRequest):
     """Save user's teer prediction."""
     try:
         pred_id = teer_service.save_teer_prediction(
@@ -163,21 +217,21 @@ async def predict_teer(request: TeerPredictionRequest):
             "success": True,
             "prediction_id": pred_id,
             "message": "Teer prediction saved successfully",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/teer/accuracy/{user_id}")
-async def get_teer_accuracy(user_id: str):
+def get_teer_accuracy(user_id: str):
     """Get user's teer prediction accuracy."""
     try:
         accuracy = teer_service.get_teer_prediction_accuracy(user_id)
         return {
             "success": True,
             "accuracy": accuracy,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -189,8 +243,11 @@ async def get_teer_accuracy(user_id: str):
 async def get_full_sports_profile(user_id: str):
     """Get complete sports profile including matches and teer."""
     try:
-        match_profile = sports_service.get_user_sports_profile(user_id)
-        teer_accuracy = teer_service.get_teer_prediction_accuracy(user_id)
+        # Independent DB reads - run them concurrently in worker threads
+        match_profile, teer_accuracy = await asyncio.gather(
+            asyncio.to_thread(sports_service.get_user_sports_profile, user_id),
+            asyncio.to_thread(teer_service.get_teer_prediction_accuracy, user_id),
+        )
         
         return {
             "success": True,
@@ -199,7 +256,7 @@ async def get_full_sports_profile(user_id: str):
             "teer_predictions": match_profile.get("teer_predictions", {}),
             "teer_accuracy": teer_accuracy,
             "overall_profile_created": match_profile.get("profile_created"),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _iso_now_cached()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -14,6 +14,27 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from services.vector_store_pg import VectorStoreService
 from services.embedding_service import EmbeddingService
 
+def _make_text_getter(columns):
+    """
+    Pick how to pull conversation text out of a batch, based on the dataset columns.
+    Common fields: 'text', 'conversation', 'input', 'response'
+    """
+    if 'text' in columns:
+        return lambda batch, idx: batch['text'][idx]
+    if 'conversation' in columns:
+        return lambda batch, idx: batch['conversation'][idx]
+    if 'input' in columns and 'response' in columns:
+        return lambda batch, idx: f"Q: {batch['input'][idx]}\nA: {batch['response'][idx]}"
+    
+    def first_text_field(batch, idx):
+        # Try to get first text field
+        for key in columns:
+            value = batch[key][idx]
+            if isinstance(value, str) and len(value) > 10:
+                return value
+        return ""
+    return first_text_field
+
 async def load_hinglish_data(batch_size=100, max_rows=10000):
     """
     Load Hinglish conversations dataset and store in vector DB.
@@ -43,64 +64,115 @@ async def load_hinglish_data(batch_size=100, max_rows=10000):
         ds = ds.select(range(min(max_rows, len(ds))))
         print(f"📊 Processing first {len(ds)} conversations")
     
-    # Process in batches
+    # Schema is constant across the dataset, so pick the text extractor once
+    columns = ds.column_names
+    get_text = _make_text_getter(columns)
+    
+    # Three-stage pipeline: read batches -> embed -> write. Bounded queues let
+    # the embedding of batch N+1 overlap the INSERT of batch N.
+    q_embed = asyncio.Queue(maxsize=4)
+    q_write = asyncio.Queue(maxsize=4)
+    num_batches = (len(ds) + batch_size - 1) // batch_size
     successful = 0
     failed = 0
+    failed_batches = 0  # embed/INSERT calls that raised; only the first few are printed
     
-    for i in tqdm(range(0, len(ds), batch_size), desc="Processing batches"):
-        batch = ds[i:i+batch_size]
-        
-        # Process each conversation in batch
-        for idx, row in enumerate(zip(*batch.values())):
-            try:
-                # Get conversation text (adjust field names based on dataset structure)
-                # Common fields: 'text', 'conversation', 'input', 'response'
-                conversation_text = ""
-                
-                if 'text' in batch:
-                    conversation_text = batch['text'][idx]
-                elif 'conversation' in batch:
-                    conversation_text = batch['conversation'][idx]
-                elif 'input' in batch and 'response' in batch:
-                    conversation_text = f"Q: {batch['input'][idx]}\nA: {batch['response'][idx]}"
-                else:
-                    # Try to get first text field
-                    for key in batch.keys():
-                        if isinstance(batch[key][idx], str) and len(batch[key][idx]) > 10:
-                            conversation_text = batch[key][idx]
-                            break
+    async def producer():
+        for i in range(0, len(ds), batch_size):
+            batch = ds[i:i+batch_size]
+            
+            # Collect the batch's conversations so they can be embedded together
+            texts = []
+            row_ids = []
+            for idx in range(len(batch[columns[0]])):
+                conversation_text = get_text(batch, idx)
                 
                 if not conversation_text or len(conversation_text) < 10:
                     continue
                 
-                # Generate embedding
-                embedding = await embedding_service.embed_text(conversation_text)
-                
-                # Store in vector database
-                # Using a generic user_id for public knowledge
-                vector_store.add_memory(
-                    user_id="hinglish_dataset",
-                    content=conversation_text,
-                    embedding=embedding,
-                    conversation_id=f"hinglish_{i+idx}",
-                    memory_type="knowledge",
-                    metadata={
+                texts.append(conversation_text)
+                row_ids.append(i + idx)
+            
+            await q_embed.put((i, texts, row_ids))
+        await q_embed.put(None)
+    
+    async def embedder():
+        nonlocal failed, failed_batches
+        while (item := await q_embed.get()) is not None:
+            i, texts, row_ids = item
+            if not texts:
+                await q_write.put((i, [], 0))
+                continue
+            try:
+                # One model forward pass for the whole batch
+                embeddings = await embedding_service.embed_texts(texts, batch_size=len(texts))
+            except Exception as e:
+                failed += len(texts)
+                failed_batches += 1
+                if failed_batches < 10:  # Only print first few errors
+                    print(f"\n⚠️ Error embedding batch starting at row {i}: {e}")
+                await q_write.put((i, [], 0))
+                continue
+            
+            # Using a generic user_id for public knowledge
+            rows = [
+                (
+                    "hinglish_dataset",
+                    f"hinglish_{row_id}",
+                    text,
+                    embedding,
+                    {
                         "source": "Hinglish-Everyday-Conversations-1M",
                         "language": "hinglish",
                         "type": "conversation",
                         "batch": i // batch_size
-                    }
+                    },
+                    "knowledge",
                 )
-                successful += 1
-                
+                for row_id, text, embedding in zip(row_ids, texts, embeddings)
+                if embedding is not None
+            ]
+            await q_write.put((i, rows, len(texts)))
+        await q_write.put(None)
+    
+    async def writer():
+        nonlocal failed
+        pending = []
+        
+        async def flush(end_row):
+            nonlocal successful, failed, failed_batches
+            rows = pending[:]
+            pending.clear()
+            try:
+                # Single multi-row INSERT, run in a thread so embedding keeps going
+                inserted = await asyncio.to_thread(vector_store.add_memories_bulk, rows)
             except Exception as e:
-                failed += 1
-                if failed < 10:  # Only print first few errors
-                    print(f"\n⚠️ Error processing row {i+idx}: {e}")
+                inserted = 0
+                failed_batches += 1
+                if failed_batches < 10:  # Only print first few errors
+                    print(f"\n⚠️ Error storing rows read before row {end_row}: {e}")
+            successful += inserted
+            failed += len(rows) - inserted
         
-        # Print progress every 10 batches
-        if (i // batch_size) % 10 == 0:
-            print(f"\n📊 Progress: {successful} successful, {failed} failed")
+        with tqdm(total=num_batches, desc="Processing batches") as progress:
+            while (item := await q_write.get()) is not None:
+                i, rows, attempted = item
+                failed += attempted - len(rows)  # rows whose embedding came back empty
+                
+                # Accumulate across short batches; flush once a full batch is pending
+                pending.extend(rows)
+                if len(pending) >= batch_size:
+                    await flush(i + batch_size)
+                progress.update(1)
+                
+                # Print progress every 10 batches
+                if (i // batch_size) % 10 == 0:
+                    print(f"\n📊 Progress: {successful} successful, {failed} failed")
+            
+            if pending:
+                await flush(len(ds))
+    
+    await asyncio.gather(producer(), embedder(), writer())
     
     print(f"\n✅ Dataset loading complete!")
     print(f"✅ Successfully loaded: {successful} conversations")
@@ -1 +1,14 @@
 """Services module for the backend."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes for CPU-bound document work (Tesseract, MuPDF), so it neither holds
+# the GIL nor grows the server's memory. Workers start on first submit, from a clean
+# forkserver process rather than a fork of the threaded server (a lock held by another
+# thread at fork time would deadlock the child); they run services.document_workers,
+# which does not import the embedding model or the database
+OCR_POOL = ProcessPoolExecutor(
+    max_workers=int(os.getenv("OCR_WORKERS", os.cpu_count() or 1)),
+    mp_context=multiprocessing.get_context("forkserver")
+)
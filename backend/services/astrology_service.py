@@ -1,16 +1,35 @@
 """Astrology and horoscope service."""
-from typing import Dict, Optional
-from utils.cache import cache_horoscope, get_cached_horoscope
-from datetime import datetime
+from typing import ClassVar, Dict, Optional
+from types import MappingProxyType
+from functools import lru_cache
+from datetime import date, datetime
 
 
 class AstrologyService:
     """Service for daily horoscopes and astrological information."""
     
-    ZODIAC_SIGNS = [
+    ZODIAC_SIGNS_LIST = [
         "aries", "taurus", "gemini", "cancer", "leo", "virgo",
         "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces"
     ]
+    ZODIAC_SIGNS = frozenset(ZODIAC_SIGNS_LIST)  # O(1) membership checks
+    
+    # Static sign metadata, allocated once rather than per get_zodiac_info call
+    _ZODIAC_INFO: ClassVar[Dict[str, Dict[str, str]]] = {
+        "aries": {"date_range": "Mar 21 - Apr 19", "element": "Fire", "planet": "Mars"},
+        "taurus": {"date_range": "Apr 20 - May 20", "element": "Earth", "planet": "Venus"},
+        "gemini": {"date_range": "May 21 - Jun 20", "element": "Air", "planet": "Mercury"},
+        "cancer": {"date_range": "Jun 21 - Jul 22", "element": "Water", "planet": "Moon"},
+        "leo": {"date_range": "Jul 23 - Aug 22", "element": "Fire", "planet": "Sun"},
+        "virgo": {"date_range": "Aug 23 - Sep 22", "element": "Earth", "planet": "Mercury"},
+        "libra": {"date_range": "Sep 23 - Oct 22", "element": "Air", "planet": "Venus"},
+        "scorpio": {"date_range": "Oct 23 - Nov 21", "element": "Water", "planet": "Pluto"},
+        "sagittarius": {"date_range": "Nov 22 - Dec 21", "element": "Fire", "planet": "Jupiter"},
+        "capricorn": {"date_range": "Dec 22 - Jan 19", "element": "Earth", "planet": "Saturn"},
+        "aquarius": {"date_range": "Jan 20 - Feb 18", "element": "Air", "planet": "Uranus"},
+        "pisces": {"date_range": "Feb 19 - Mar 20", "element": "Water", "planet": "Neptune"},
+    }
+    ZODIAC_INFO = MappingProxyType(_ZODIAC_INFO)  # read-only public view, no copy
     
     # Sample horoscope templates (in production, use API)
     HOROSCOPE_TEMPLATES = {
@@ -60,6 +79,9 @@ class AstrologyService:
         }
     }
     
+    # Lowercased language -> {sign: text}, built once at class creation
+    TRANSLATIONS_BY_LANG = {lang.lower(): texts for lang, texts in TRANSLATIONS.items()}
+    
     @classmethod
     def get_daily_horoscope(cls, sign: str, language: str = "english") -> Optional[str]:
         """
@@ -73,52 +95,35 @@ class AstrologyService:
             Horoscope text
         """
         sign = sign.lower()
-        
+        # Reject unknown signs before touching the memo
         if sign not in cls.ZODIAC_SIGNS:
             return None
+        return cls._resolve(sign, language.lower(), datetime.now().date())
+    
+    @classmethod
+    @lru_cache(maxsize=64)
+    def _resolve(cls, sign: str, language: str, day: date) -> Optional[str]:
+        """
+        Resolve an already-lowercased (sign, language) pair for a day.
         
-        # Check cache
-        cached = get_cached_horoscope(sign)
-        if cached:
-            return cached
-        
+        Memoized in-process; the day is part of the key so entries roll over at
+        midnight, and the texts are static, so no shared cache is consulted.
+        """
         # Get horoscope based on language
-        if language.lower() == "hindi" and sign in cls.TRANSLATIONS.get("hindi", {}):
-            horoscope = cls.TRANSLATIONS["hindi"][sign]
-        elif language.lower() == "assamese" and sign in cls.TRANSLATIONS.get("assamese", {}):
-            horoscope = cls.TRANSLATIONS["assamese"][sign]
-        else:
-            horoscope = cls.HOROSCOPE_TEMPLATES.get(sign, "Please try another zodiac sign.")
-        
-        # Cache the result
-        cache_horoscope(sign, horoscope)
-        
-        return horoscope
+        texts = cls.TRANSLATIONS_BY_LANG.get(language, cls.HOROSCOPE_TEMPLATES)
+        return texts.get(sign) or cls.HOROSCOPE_TEMPLATES.get(sign, "Please try another zodiac sign.")
     
     @classmethod
     def get_zodiac_info(cls, sign: str) -> Optional[Dict]:
         """Get information about a zodiac sign."""
-        info = {
-            "aries": {"date_range": "Mar 21 - Apr 19", "element": "Fire", "planet": "Mars"},
-            "taurus": {"date_range": "Apr 20 - May 20", "element": "Earth", "planet": "Venus"},
-            "gemini": {"date_range": "May 21 - Jun 20", "element": "Air", "planet": "Mercury"},
-            "cancer": {"date_range": "Jun 21 - Jul 22", "element": "Water", "planet": "Moon"},
-            "leo": {"date_range": "Jul 23 - Aug 22", "element": "Fire", "planet": "Sun"},
-            "virgo": {"date_range": "Aug 23 - Sep 22", "element": "Earth", "planet": "Mercury"},
-            "libra": {"date_range": "Sep 23 - Oct 22", "element": "Air", "planet": "Venus"},
-            "scorpio": {"date_range": "Oct 23 - Nov 21", "element": "Water", "planet": "Pluto"},
-            "sagittarius": {"date_range": "Nov 22 - Dec 21", "element": "Fire", "planet": "Jupiter"},
-            "capricorn": {"date_range": "Dec 22 - Jan 19", "element": "Earth", "planet": "Saturn"},
-            "aquarius": {"date_range": "Jan 20 - Feb 18", "element": "Air", "planet": "Uranus"},
-            "pisces": {"date_range": "Feb 19 - Mar 20", "element": "Water", "planet": "Neptune"},
-        }
-        
-        return info.get(sign.lower())
+        info = cls._ZODIAC_INFO.get(sign.lower())
+        # Small per-call copy so callers can't mutate the shared table
+        return dict(info) if info else None
     
     @classmethod
     def get_all_signs(cls):
         """Get list of all zodiac signs."""
-        return cls.ZODIAC_SIGNS
+        return cls.ZODIAC_SIGNS_LIST
 
 
 # Global astrology service instance
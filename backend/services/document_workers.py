@@ -0,0 +1,60 @@
+"""OCR_POOL entry points for OCR and PDF text extraction.
+
+Pool workers import this module, so it stays light: MuPDF, and the OCR service on
+first use, but never the embedding model or the database connection.
+"""
+from typing import Dict, List, Optional, Tuple
+import fitz  # PyMuPDF
+
+# Pages with less text than this that carry images are treated as scans and OCRed,
+# from a greyscale render at SCANNED_PAGE_DPI (an A4 page is then ~1650x2340px)
+SCANNED_PAGE_MIN_CHARS = 40
+SCANNED_PAGE_DPI = 200
+
+
+def extract_page_range(
+    file_path: str,
+    start: int,
+    stop: int,
+    ocr_language: str = "eng",
+    ocr_text: Optional[Dict[int, str]] = None
+) -> Tuple[List[str], Dict[int, str]]:
+    """
+    Text of pages [start, stop), opened fresh (MuPDF documents can't be shared across processes).
+
+    Pages are read one after another; callers parallelise by submitting several ranges.
+    Only scanned pages (see SCANNED_PAGE_MIN_CHARS) go through OCR; text-native
+    pages are read from the text layer. OCR is uncached here: the caller passes the
+    OCR text it already has for scanned pages (by page index) and caches what comes back.
+
+    Returns:
+        (page texts, {page index: OCR text} for the pages recognised by this call)
+    """
+    # Imported here: ocr_service imports the services package, which owns the pool
+    from services.ocr_service import ocr_service
+
+    ocr_text = ocr_text or {}
+    pages = []
+    recognised = {}
+    with fitz.open(file_path) as doc:
+        for page_num in range(start, stop):
+            page = doc[page_num]
+            # TEXTFLAGS_TEXT: plain text only, no image or vector-drawing blocks
+            text = page.get_text("text", flags=fitz.TEXTFLAGS_TEXT)
+            if len(text.strip()) < SCANNED_PAGE_MIN_CHARS and page.get_images():
+                ocr = ocr_text.get(page_num)
+                if ocr is None:
+                    png = page.get_pixmap(dpi=SCANNED_PAGE_DPI, colorspace=fitz.csGRAY).tobytes("png")
+                    ocr = ocr_service.extract_text_from_bytes_uncached(png, ocr_language)
+                    if ocr is not None:
+                        recognised[page_num] = ocr
+                text = ocr or text
+            pages.append(text)
+    return pages, recognised
+
+
+def extract_image_text(image_path: str, language: str = "eng") -> Optional[str]:
+    """OCR one image file with the worker process's own OCR service instance (uncached; the caller caches)."""
+    from services.ocr_service import ocr_service
+
+    return ocr_service.extract_text_uncached(image_path, language)
@@ -1,141 +1,293 @@
 """DuckDuckGo search service - FREE alternative to paid APIs."""
-import requests
-from typing import List, Dict, Optional
-import json
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, parse_qs, unquote
+import asyncio
+import logging
+import re
+import threading
+import weakref
+import httpx
+import orjson
+from cachetools import TTLCache
+from typing import List, Dict, Optional, Tuple
+import lxml.html
+from lxml import etree
+from urllib.parse import urlparse, unquote_plus
+
+logger = logging.getLogger(__name__)
+
+HTML_SEARCH_URL = "https://html.duckduckgo.com/html/"
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html',
+}
+# Substring patterns ("google." covers every ccTLD), so these are matched with `in`, not endswith
+SEARCH_ENGINE_HOSTS = ("duckduckgo.com", "google.", "bing.", "yahoo.")
+
+# Target URL inside DuckDuckGo redirect links like /l/?uddg=<url>&rut=...
+UDDG_RE = re.compile(r'[?&]uddg=([^&]+)')
+
+# Compiled once: the XPath equivalent of the CSS selector "a.result__a"
+RESULT_LINKS = etree.XPath("//a[contains(concat(' ', normalize-space(@class), ' '), ' result__a ')]")
 
 
 class DuckDuckGoSearch:
     """Free search using DuckDuckGo Instant Answer API."""
-    
+
     def __init__(self):
         self.api_url = "https://api.duckduckgo.com/"
-    
-    def search(self, query: str, limit: int = 5) -> Optional[Dict]:
+        self.limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        # Ask for compressed bodies explicitly (br needs the brotli package; httpx decodes both)
+        self.headers = {'User-Agent': 'MyDost/1.0', 'Accept-Encoding': 'gzip, br'}
+        # Cap on in-flight searches from search_many; HTTP/2 multiplexes them over one
+        # connection, but servers still limit concurrent streams per connection
+        self.max_concurrent = 20
+
+        # One AsyncClient per event loop, for the same reason as MultiSearchService._clients
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+        # Recent results keyed by (normalized query, limit); shared across worker threads
+        self._cache: TTLCache = TTLCache(maxsize=512, ttl=300)
+        self._cache_lock = threading.Lock()
+
+        # Pooled keep-alive client for synchronous callers; http2 and limits belong to
+        # the transport, since httpx ignores the client-level ones when a transport is given
+        self.sync_client = httpx.Client(
+            timeout=10.0,
+            headers=self.headers,
+            transport=httpx.HTTPTransport(http2=True, limits=self.limits, retries=2)
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Keep-alive AsyncClient for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=10.0,
+                headers=self.headers,
+                transport=httpx.AsyncHTTPTransport(http2=True, limits=self.limits, retries=2)
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aclose_loop_client(self):
+        """Close the running loop's AsyncClient (call before closing a short-lived loop)."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def close(self):
+        """Close the current loop's AsyncClient and the sync client (call on app shutdown)."""
+        await self.aclose_loop_client()
+        self.sync_client.close()
+
+    @staticmethod
+    def _cache_key(query: str, limit: int) -> Tuple[str, int]:
+        return (query.strip().lower(), limit)
+
+    def _cache_get(self, key: Tuple[str, int]) -> Optional[Dict]:
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        return {**cached, 'from_cache': True} if cached else None
+
+    def _cache_put(self, key: Tuple[str, int], result: Optional[Dict]) -> Optional[Dict]:
+        """Remember non-empty results; empty ones are not cached so they can be retried."""
+        if result and result.get('results'):
+            with self._cache_lock:
+                self._cache[key] = result
+        return result
+
+    @staticmethod
+    def _instant_answer_params(query: str) -> Dict:
+        return {
+            'q': query,
+            'format': 'json',
+            'no_html': 1,
+            'skip_disambig': 1
+        }
+
+    @staticmethod
+    def _parse_instant_answer(data: Dict, query: str, limit: int) -> List[Dict]:
+        """Turn an Instant Answer API payload into result dicts."""
+        results = []
+
+        # Get Abstract (main result)
+        if data.get('Abstract'):
+            results.append({
+                'title': data.get('Heading', query),
+                'url': data.get('AbstractURL', ''),
+                'snippet': data.get('Abstract', ''),
+                'source': data.get('AbstractSource', 'DuckDuckGo')
+            })
+
+        # Get Related Topics
+        for topic in data.get('RelatedTopics', [])[:limit]:
+            if isinstance(topic, dict) and 'Text' in topic:
+                results.append({
+                    'title': topic.get('Text', '')[:100],
+                    'url': topic.get('FirstURL', ''),
+                    'snippet': topic.get('Text', ''),
+                    'source': 'DuckDuckGo'
+                })
+
+        return results
+
+    async def search(self, query: str, limit: int = 5) -> Optional[Dict]:
         """
         Search using DuckDuckGo Instant Answer API (FREE, no API key needed).
-        
+
         Args:
             query: Search query
             limit: Number of results (DuckDuckGo returns what it has)
-        
+
         Returns:
             Search results in standard format
         """
+        key = self._cache_key(query, limit)
+        cached = self._cache_get(key)
+        if cached:
+            return cached
+        return self._cache_put(key, await self._search(query, limit))
+
+    async def _search(self, query: str, limit: int) -> Optional[Dict]:
+        """Uncached Instant Answer lookup with HTML fallback."""
         try:
-            params = {
-                'q': query,
-                'format': 'json',
-                'no_html': 1,
-                'skip_disambig': 1
-            }
-            
-            response = requests.get(
-                self.api_url,
-                params=params,
-                timeout=10,
-                headers={'User-Agent': 'MyDost/1.0'}
-            )
-            
+            response = await self.client.get(self.api_url, params=self._instant_answer_params(query))
+
             if response.status_code == 200:
-                data = response.json()
-                results = []
-                
-                # Get Abstract (main result)
-                if data.get('Abstract'):
-                    results.append({
-                        'title': data.get('Heading', query),
-                        'url': data.get('AbstractURL', ''),
-                        'snippet': data.get('Abstract', ''),
-                        'source': data.get('AbstractSource', 'DuckDuckGo')
-                    })
-                
-                # Get Related Topics
-                for topic in data.get('RelatedTopics', [])[:limit]:
-                    if isinstance(topic, dict) and 'Text' in topic:
-                        results.append({
-                            'title': topic.get('Text', '')[:100],
-                            'url': topic.get('FirstURL', ''),
-                            'snippet': topic.get('Text', ''),
-                            'source': 'DuckDuckGo'
-                        })
-                
+                results = self._parse_instant_answer(orjson.loads(response.content), query, limit)
+
                 # If no results, try lightweight HTML scraping
                 if not results:
-                    html_fallback = self._web_search(query, limit)
-                    if html_fallback:
-                        return html_fallback
-                    return None
-                
+                    return await self._web_search(query, limit)
+
                 return {
                     'results': results[:limit],
                     'query': query,
                     'from_cache': False,
                     'provider': 'duckduckgo'
                 }
-            
+
             return None
-            
-        except Exception as e:
-            print(f"DuckDuckGo search error: {e}")
+
+        except Exception:
+            logger.exception("DuckDuckGo search error")
             return None
 
-    def _web_search(self, query: str, limit: int) -> Optional[Dict]:
+    async def search_many(self, queries: List[str], limit: int = 5) -> List[Optional[Dict]]:
+        """
+        Run several searches concurrently on the shared connection pool.
+
+        Args:
+            queries: Search queries; duplicates (after normalization) are fetched once
+            limit: Number of results per query
+
+        Returns:
+            One result (or None / the raised exception) per input query, in input order
+        """
+        sem = asyncio.Semaphore(self.max_concurrent)
+
+        async def bounded(query: str):
+            async with sem:
+                return await self.search(query, limit)
+
+        unique = {}
+        for query in queries:
+            unique.setdefault(self._cache_key(query, limit), query)
+        results = await asyncio.gather(*(bounded(q) for q in unique.values()), return_exceptions=True)
+        by_key = dict(zip(unique.keys(), results))
+        return [by_key[self._cache_key(query, limit)] for query in queries]
+
+    def search_sync(self, query: str, limit: int = 5) -> Optional[Dict]:
+        """Blocking variant of search() for synchronous callers; same arguments, result and cache."""
+        key = self._cache_key(query, limit)
+        cached = self._cache_get(key)
+        if cached:
+            return cached
+        return self._cache_put(key, self._search_sync(query, limit))
+
+    def _search_sync(self, query: str, limit: int) -> Optional[Dict]:
+        """Uncached blocking lookup with HTML fallback."""
+        try:
+            response = self.sync_client.get(self.api_url, params=self._instant_answer_params(query))
+
+            if response.status_code == 200:
+                results = self._parse_instant_answer(orjson.loads(response.content), query, limit)
+
+                if not results:
+                    resp = self.sync_client.get(HTML_SEARCH_URL, params={'q': query}, headers=BROWSER_HEADERS)
+                    if resp.status_code != 200:
+                        return None
+                    return self._parse_html(resp.content, query, limit)
+
+                return {
+                    'results': results[:limit],
+                    'query': query,
+                    'from_cache': False,
+                    'provider': 'duckduckgo'
+                }
+
+            return None
+
+        except Exception:
+            logger.exception("DuckDuckGo search error")
+            return None
+
+    async def _web_search(self, query: str, limit: int) -> Optional[Dict]:
         """Fallback to HTML scraping; extracts real article links (not search-engine URLs)."""
         try:
-            search_url = f"https://html.duckduckgo.com/html/?q={requests.utils.quote(query)}"
-            resp = requests.get(
-                search_url,
-                timeout=10,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            )
+            resp = await self.client.get(HTML_SEARCH_URL, params={'q': query}, headers=BROWSER_HEADERS)
             if resp.status_code != 200:
                 return None
+            logger.debug(
+                "DuckDuckGo HTML: %s bytes on the wire (%s), %d decoded",
+                resp.headers.get('content-length', '?'),
+                resp.headers.get('content-encoding', 'identity'),
+                len(resp.content)
+            )
+            return self._parse_html(resp.content, query, limit)
+        except Exception:
+            logger.exception("DuckDuckGo web search error")
+            return None
 
-            soup = BeautifulSoup(resp.text, "html.parser")
-            results = []
-            for a in soup.select('a.result__a'):
-                href = a.get('href', '')
-                # DuckDuckGo uses redirect links like /l/?uddg=<url>
-                if '/l/?uddg=' in href:
-                    parsed = urlparse(href)
-                    uddg = parse_qs(parsed.query).get('uddg', [''])[0]
-                    real_url = unquote(uddg)
-                else:
-                    real_url = href
-
-                host = urlparse(real_url).hostname or ""
-                # Skip search-engine domains
-                if any(engine in host for engine in ["duckduckgo.com", "google.", "bing.", "yahoo."]):
-                    continue
-
-                title = a.get_text(strip=True)
-                if not real_url or not title:
-                    continue
+    @staticmethod
+    def _parse_html(html: bytes, query: str, limit: int) -> Optional[Dict]:
+        """Extract result links from the DuckDuckGo HTML page (raw bytes; lxml detects the encoding)."""
+        results = []
+        for a in RESULT_LINKS(lxml.html.fromstring(html)):
+            href = a.get('href', '')
+            # DuckDuckGo uses redirect links like /l/?uddg=<url>
+            m = UDDG_RE.search(href)
+            real_url = unquote_plus(m.group(1)) if m else href
 
-                results.append({
-                    "title": title,
-                    "url": real_url,
-                    "snippet": title,
-                    "source": host,
-                })
-                if len(results) >= limit:
-                    break
+            host = urlparse(real_url).hostname or ""
+            # Skip search-engine domains
+            if any(engine in host for engine in SEARCH_ENGINE_HOSTS):
+                continue
 
-            if not results:
-                return None
+            title = " ".join(a.text_content().split())
+            if not real_url or not title:
+                continue
 
-            return {
-                "results": results,
-                "query": query,
-                "from_cache": False,
-                "provider": "duckduckgo_html"
-            }
-        except Exception as e:
-            print(f"DuckDuckGo web search error: {e}")
+            results.append({
+                "title": title,
+                "url": real_url,
+                "snippet": title,
+                "source": host,
+            })
+            if len(results) >= limit:
+                break
+
+        if not results:
             return None
 
+        return {
+            "results": results,
+            "query": query,
+            "from_cache": False,
+            "provider": "duckduckgo_html"
+        }
+
 
 # Singleton instance
 duckduckgo_search = DuckDuckGoSearch()
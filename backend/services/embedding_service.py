@@ -1,8 +1,73 @@
 """Embedding service for text vectorization."""
-from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 from utils.config import config
+from utils.embedding_cache import open_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'paraphrase-multilingual-mpnet-base-v2'
+
+# Concurrent embed_text calls are coalesced into one encode() of up to this many texts
+MICRO_BATCH_MAX = 32
+MICRO_BATCH_WINDOW = 0.005  # seconds to wait for more texts after the first arrives
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime (CPU) replacement for SentenceTransformer.encode.
+    
+    Loads an exported model from `path`, exporting it from the HuggingFace model on
+    first use (same as `optimum-cli export onnx --model <MODEL_NAME> <path>`).
+    Mean pooling over the attention mask matches the mpnet sentence-transformer head.
+    """
+    
+    max_seq_length = 128
+    
+    def __init__(self, path: str, model_name: str = MODEL_NAME):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+        
+        if os.path.isdir(path):
+            self.model = ORTModelForFeatureExtraction.from_pretrained(path)
+            self.tokenizer = AutoTokenizer.from_pretrained(path)
+        else:
+            self.model = ORTModelForFeatureExtraction.from_pretrained(
+                f"sentence-transformers/{model_name}", export=True
+            )
+            self.tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{model_name}")
+            self.model.save_pretrained(path)
+            self.tokenizer.save_pretrained(path)
+    
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Embed a string (-> 1-D array) or list of strings (-> 2-D array)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        pooled = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        
+        embeddings = np.concatenate(pooled).astype(np.float32, copy=False) if pooled else np.zeros((0, 768), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
 
 
 class EmbeddingService:
@@ -15,10 +80,69 @@ class EmbeddingService:
         # 'all-MiniLM-L6-v2' (384 dim) - Fast, good quality
         # 'all-mpnet-base-v2' (768 dim) - BEST quality, slower
         # 'paraphrase-multilingual-mpnet-base-v2' (768 dim) - BEST for multilingual
-        self.model = SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')  # BEST for Hindi/Assamese/English
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.backend = 'onnx' if self.device == 'cpu' and config.EMBEDDING_BACKEND == 'onnx' else 'torch'
         self.dimension = 768
+        self.batch_size = config.EMBEDDING_BATCH_SIZE or (64 if self.device == 'cuda' else 32)
+        
+        # Weights (~1GB) load on first use, not at import, so startup and non-embedding workers stay light
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._disk_cache = None
+        self._disk_cache_opened = False
+        
+        # One worker owns the model: encodes run FIFO, each with all intra-op BLAS threads,
+        # instead of several default-executor threads oversubscribing the CPU
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        if self.device == 'cpu':
+            torch.set_num_threads(os.cpu_count() or 1)
+        
+        # Micro-batching state, bound to the event loop that first calls embed_text
+        self._batch_loop = None
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker_task: Optional[asyncio.Task] = None
+    
+    @property
+    def model(self):
+        """The encoder, loaded once on first access (thread-safe)."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
     
-    async def embed_text(self, text: str) -> Optional[List[float]]:
+    def _load_model(self):
+        """Build the configured encoder, falling back to PyTorch if ONNX is unavailable."""
+        # On CPU, ONNX Runtime (fused kernels) is 2-4x faster than the PyTorch forward pass
+        if self.backend == 'onnx':
+            try:
+                return OnnxSentenceEncoder(config.EMBEDDING_ONNX_PATH)
+            except ImportError:
+                logger.warning("optimum[onnxruntime] not installed, using PyTorch embeddings")
+            except Exception:
+                logger.exception("ONNX embedding model failed to load, using PyTorch embeddings")
+            self.backend = 'torch'
+        
+        model = SentenceTransformer(MODEL_NAME, device=self.device)  # BEST for Hindi/Assamese/English
+        if self.device == 'cuda':
+            model.half()  # FP16 inference; outputs are upcast to float32 below
+        return model
+    
+    def warmup(self):
+        """Load the model and run a throwaway encode so one-time init costs aren't paid by a user."""
+        try:
+            self.model.encode(["warmup"] * 4, batch_size=4, normalize_embeddings=True)
+            if self.device == 'cuda':
+                torch.cuda.synchronize()
+            logger.info("Embedding model warmed up on %s (%s)", self.device, self.backend)
+        except Exception:
+            logger.exception("Embedding warmup failed")
+    
+    def start_warmup(self):
+        """Warm up on the embedding thread in the background; returns immediately."""
+        return self._executor.submit(self.warmup)
+    
+    async def embed_text(self, text: str) -> Optional[np.ndarray]:
         """
         Convert text to embedding vector.
         
@@ -26,52 +150,183 @@ class EmbeddingService:
             text: Text to embed
         
         Returns:
-            List of floats representing the embedding
+            float32 numpy array of shape (dimension,), or None
         """
+        if not text or len(text.strip()) == 0:
+            return None
+        
+        # Hand the text to the batch worker so concurrent requests share one forward pass
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            self._batch_loop = loop
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker_task = loop.create_task(self._batch_worker(self._batch_queue))
+        
+        future = loop.create_future()
+        await self._batch_queue.put((text, future))
+        return await future
+    
+    async def _batch_worker(self, queue: asyncio.Queue):
+        """Drain queued embed_text calls into micro-batches and resolve their futures."""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await queue.get()]
+            if queue.qsize() < MICRO_BATCH_MAX - 1:
+                await asyncio.sleep(MICRO_BATCH_WINDOW)
+            while len(items) < MICRO_BATCH_MAX:
+                try:
+                    items.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            texts = [text for text, _ in items]
+            try:
+                # Cache lookup + encode run on the embedding thread to avoid blocking the event loop
+                embeddings = await loop.run_in_executor(self._executor, self._encode_cached, texts)
+            except Exception:
+                logger.exception("Error embedding text")
+                embeddings = [None] * len(items)
+            
+            for (_, future), embedding in zip(items, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+    
+    def _encode_cached(self, texts: List[str]) -> List[np.ndarray]:
+        """Encode texts, serving repeats from the on-disk cache (runs on the embedding thread)."""
+        def encode(batch: List[str]) -> np.ndarray:
+            # Contiguous float32 rows; pgvector's adapter accepts ndarrays directly
+            return np.asarray(self.model.encode(
+                batch,
+                convert_to_numpy=True,
+                batch_size=len(batch),
+                normalize_embeddings=True
+            ), dtype=np.float32)
+        
+        # Load the model first: an ONNX failure switches self.backend, which namespaces the cache
+        self.model
+        cache = self._get_disk_cache()
+        if cache is None:
+            return list(encode(texts))
+        
+        keys = [cache.key(text) for text in texts]
         try:
-            if not text or len(text.strip()) == 0:
-                return None
-            # Run blocking model.encode in a thread to avoid blocking the event loop
-            import asyncio
-            loop = asyncio.get_running_loop()
-            embedding = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(text, convert_to_tensor=False)
+            hits = cache.get_many(list(set(keys)))
+        except Exception:
+            logger.exception("Embedding cache read failed")
+            hits = {}
+        
+        # Encode each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in hits:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = dict(zip(missing.keys(), encode(list(missing.values()))))
+            try:
+                cache.put_many(fresh.items())
+            except Exception:
+                logger.exception("Embedding cache write failed")
+            hits.update(fresh)
+        return [hits[key] for key in keys]
+    
+    def _get_disk_cache(self):
+        """Open the persistent embedding cache once, after the model (and backend) is settled."""
+        if not self._disk_cache_opened:
+            self._disk_cache_opened = True
+            self._disk_cache = open_embedding_cache(
+                config.EMBEDDING_CACHE_PATH,
+                self.dimension,
+                config.EMBEDDING_CACHE_MAX_MB,
+                namespace=f"{MODEL_NAME}:{self.backend}"
             )
-            return embedding.tolist() if embedding is not None else None
+        return self._disk_cache
+    
+    async def embed_text_list(self, text: str) -> Optional[List[float]]:
+        """Legacy variant of embed_text returning a plain list (for JSON or non-pgvector callers)."""
+        embedding = await self.embed_text(text)
+        return embedding.tolist() if embedding is not None else None
+    
+    async def embed_texts_stream(
+        self,
+        texts: List[str],
+        chunk_size: int = 256,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[np.ndarray]:
+        """
+        Embed texts chunk by chunk, yielding one float32 vector per text in order.
         
-        except Exception as e:
-            print(f"Error embedding text: {str(e)}")
-            return None
+        Only one chunk's embeddings are alive at a time, so peak memory does not grow
+        with len(texts). Prefer this in loops that write straight to a vector store.
+        
+        Args:
+            texts: List of texts to embed
+            chunk_size: Texts per encode() call
+            batch_size: Model batch size inside each chunk (defaults to the device-tuned size)
+        """
+        loop = asyncio.get_running_loop()
+        batch_size = batch_size or self.batch_size
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts[start:start + chunk_size]
+            embeddings = await loop.run_in_executor(
+                self._executor,
+                lambda: self.model.encode(
+                    chunk,
+                    convert_to_numpy=True,
+                    batch_size=batch_size,
+                    normalize_embeddings=True
+                )
+            )
+            for embedding in embeddings:
+                yield embedding.astype(np.float32, copy=False)
     
-    async def embed_texts(self, texts: List[str], batch_size: int = 32) -> List[Optional[List[float]]]:
+    async def embed_texts(self, texts: List[str], batch_size: Optional[int] = None) -> Union[np.ndarray, List[None]]:
         """
         Convert multiple texts to embeddings.
         
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process at once
+            batch_size: Number of texts to process at once (defaults to the device-tuned size)
         
         Returns:
-            List of embeddings
+            float32 array of shape (len(texts), dimension); a list of None on failure
         """
         try:
-            import asyncio
-            loop = asyncio.get_running_loop()
-            embeddings = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(texts, convert_to_tensor=False, batch_size=batch_size)
-            )
-            return [emb.tolist() for emb in embeddings]
+            # Fill one preallocated result instead of holding the model output plus a converted copy
+            out = np.empty((len(texts), self.dimension), dtype=np.float32)
+            i = 0
+            async for embedding in self.embed_texts_stream(texts, batch_size=batch_size):
+                out[i] = embedding
+                i += 1
+            return out
         
-        except Exception as e:
-            print(f"Error embedding texts: {str(e)}")
+        except Exception:
+            logger.exception("Error embedding texts")
             return [None] * len(texts)
     
-    def similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Blocking batch embed for callers already on a worker thread (not the event loop).
+        
+        The encode still runs on the embedding thread, queued behind the async calls,
+        and repeats are served from the on-disk cache.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.stack(self._executor.submit(self._encode_cached, texts).result())
+    
+    def similarity(self, embedding1: Union[np.ndarray, List[float]], embedding2: Union[np.ndarray, List[float]]) -> float:
         """
         Calculate cosine similarity between two embeddings.
         
+        Embeddings from this service are unit-norm, so cosine similarity is just the
+        dot product (and inner-product ANN indexes can treat it as cosine).
+        
         Args:
             embedding1: First embedding
             embedding2: Second embedding
@@ -80,29 +335,87 @@ class EmbeddingService:
             Cosine similarity score (0-1)
         """
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-            
-            # Cosine similarity
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            return float(dot_product / (norm1 * norm2))
+            return float(np.dot(
+                np.asarray(embedding1, dtype=np.float32),
+                np.asarray(embedding2, dtype=np.float32)
+            ))
         
-        except Exception as e:
-            print(f"Error calculating similarity: {str(e)}")
+        except Exception:
+            logger.exception("Error calculating similarity")
             return 0.0
     
+    def similarity_batch(self, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of one query against many candidates in a single matrix-vector product.
+        
+        Args:
+            query: Query embedding, shape (dimension,)
+            candidates: Candidate embeddings, shape (N, dimension)
+        
+        Returns:
+            float32 array of N similarity scores (0 where a vector has zero norm)
+        """
+        q = np.asarray(query, dtype=np.float32)
+        c = np.ascontiguousarray(candidates, dtype=np.float32)
+        if c.size == 0:
+            return np.zeros(0, dtype=np.float32)
+        
+        q_norm = np.linalg.norm(q)
+        c_norms = np.linalg.norm(c, axis=1)
+        if q_norm == 0:
+            return np.zeros(len(c), dtype=np.float32)
+        
+        scores = (c @ q) / q_norm  # one BLAS sgemv
+        np.divide(scores, c_norms, out=scores, where=c_norms != 0)
+        scores[c_norms == 0] = 0.0
+        return scores
+    
+    @staticmethod
+    def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Symmetric per-vector int8 quantization (1/4 the bytes of float32).
+        
+        Args:
+            embeddings: One embedding (dimension,) or a matrix (N, dimension)
+        
+        Returns:
+            (int8 codes with the same shape, float32 scale per vector) where
+            embedding ~= codes * scale
+        """
+        v = np.asarray(embeddings, dtype=np.float32)
+        scale = np.abs(v).max(axis=-1, keepdims=True) / 127.0
+        scale[scale == 0] = 1.0
+        codes = np.round(v / scale).astype(np.int8)
+        return codes, scale.squeeze(-1).astype(np.float32)
+    
+    def similarity_batch_int8(
+        self,
+        query_codes: np.ndarray,
+        query_scale: float,
+        candidate_codes: np.ndarray,
+        candidate_scales: np.ndarray
+    ) -> np.ndarray:
+        """
+        Approximate cosine scores from int8-quantized unit embeddings (see quantize_int8).
+        
+        Embeddings from this service are unit-norm, so the norm terms drop out and the
+        score is the integer dot product rescaled by both scales. similarity_batch is
+        the exact float32 path to compare recall against.
+        
+        Returns:
+            float32 array of N approximate similarity scores
+        """
+        # Accumulate in int32: an int8 x int8 dot over 768 dims overflows int8/int16
+        dots = np.ascontiguousarray(candidate_codes, dtype=np.int32) @ np.asarray(query_codes, dtype=np.int32)
+        return (dots * (np.asarray(candidate_scales, dtype=np.float32) * np.float32(query_scale))).astype(np.float32)
+    
     def get_info(self) -> Dict[str, Any]:
         """Get information about the embedding service."""
         return {
-            "model": "paraphrase-multilingual-mpnet-base-v2",
+            "model": MODEL_NAME,
             "dimension": self.dimension,
-            "type": "SentenceTransformer",
+            "device": self.device,
+            "type": "SentenceTransformer" if self.backend == 'torch' else "ONNX Runtime",
         }
 
 
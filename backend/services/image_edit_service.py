@@ -1,8 +1,182 @@
 """Image editing service for basic image manipulations."""
-from typing import Optional, Dict, Any, Tuple
-from PIL import Image, ImageEnhance, ImageDraw, ImageFont
+from typing import Optional, Dict, Any, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from cachetools import LRUCache
+from PIL import Image, ImageEnhance, ImageDraw, ImageFile, ImageFont
+import numpy as np
+import aiohttp
+import asyncio
 import io
 import os
+import threading
+
+# pyvips (libvips + libjpeg-turbo) is optional; Pillow is the fallback.
+# A missing libvips shared library surfaces as OSError, not ImportError.
+try:
+    import pyvips
+    PYVIPS_AVAILABLE = True
+except (ImportError, OSError):
+    PYVIPS_AVAILABLE = False
+
+# Source formats worth keeping on output; anything else is re-encoded as PNG
+LOSSY_FORMATS = {"JPEG", "WEBP"}
+
+# Edit methods usable in batch_process, and the subset with a pyvips implementation
+BATCH_OPS = {"crop", "resize", "enhance", "enhance_brightness", "enhance_contrast", "enhance_sharpness", "annotate_text", "grayscale"}
+VIPS_BATCH_OPS = {"crop", "resize", "enhance_brightness", "enhance_contrast", "grayscale"}
+
+# 8-bit modes whose brightness/contrast run as a lookup table; others use ImageEnhance
+LUT_ENHANCE_MODES = {"L", "RGB", "RGBA"}
+
+# ITU-R 601-2 luma weights, as used by Image.convert("L")
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+# Decoded rasters kept for repeat edits of the same file (see ImageEditingService.load),
+# bounded by their size in memory
+DECODE_CACHE_BYTES = 256 * 1024 * 1024
+
+# zlib levels for PNG output: results handed straight back in an HTTP response are
+# short-lived, so encode speed wins; files kept around are worth the slower, smaller encode
+PNG_EPHEMERAL_LEVEL = 1
+PNG_PERSIST_LEVEL = 9
+
+# Read size for fetch_thumbnail; the header of most images fits in the first chunk
+FETCH_CHUNK_SIZE = 4096
+
+
+def _raster_bytes(image: Image.Image) -> int:
+    """Approximate memory held by a decoded image."""
+    return image.width * image.height * len(image.getbands())
+
+
+_decode_cache: LRUCache = LRUCache(maxsize=DECODE_CACHE_BYTES, getsizeof=_raster_bytes)
+_decode_lock = threading.Lock()
+
+
+def _load_decoded(path: str, mtime_ns: int, size: int) -> Image.Image:
+    """
+    Fully decode an image file; mtime and size are part of the key so edits on disk miss.
+    
+    Callers must treat the result as read-only, since it is shared across calls.
+    """
+    key = (path, mtime_ns, size)
+    with _decode_lock:
+        image = _decode_cache.get(key)
+    if image is not None:
+        return image
+    
+    image = Image.open(path)
+    image.load()
+    with _decode_lock:
+        try:
+            _decode_cache[key] = image
+        except ValueError:
+            pass  # larger than the whole cache; not kept
+    return image
+
+
+def _choose_format(source_format: Optional[str], output_format: Optional[str] = None) -> str:
+    """
+    Pick the output container: the caller's choice, else the source's if lossy, else PNG.
+    
+    Args:
+        source_format: Pillow-style format of the original image (e.g. "JPEG"), if known
+        output_format: Explicit format such as "JPEG", "PNG" or "WEBP"
+    
+    Returns:
+        Pillow-style format name
+    """
+    if output_format:
+        fmt = output_format.upper()
+        return "JPEG" if fmt == "JPG" else fmt
+    return source_format if source_format in LOSSY_FORMATS else "PNG"
+
+
+def _save_bytes(image: Image.Image, fmt: str, compress_level: int = PNG_EPHEMERAL_LEVEL) -> bytes:
+    """
+    Encode a Pillow image with settings tuned per format.
+    
+    Args:
+        image: Image to encode
+        fmt: Pillow format name, usually from _choose_format()
+        compress_level: zlib level for PNG (PNG_EPHEMERAL_LEVEL or PNG_PERSIST_LEVEL)
+    
+    Returns:
+        Encoded image bytes
+    """
+    output = io.BytesIO()
+    if fmt == "JPEG":
+        if image.mode not in ("RGB", "L", "CMYK"):
+            image = image.convert("RGB")
+        # Optimal Huffman tables (a few % smaller) and progressive scans, with
+        # 4:2:0 chroma subsampling like cjpeg's default
+        image.save(output, format="JPEG", quality=90, optimize=True, progressive=True, subsampling="4:2:0")
+    elif fmt == "PNG":
+        # No optimize: it forces level 9 and retries every row filter
+        image.save(output, format="PNG", compress_level=compress_level, optimize=False)
+    else:
+        image.save(output, format=fmt)
+    return output.getvalue()
+
+
+@lru_cache(maxsize=16)
+def _load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Parsed font per (file, size); font files are read once per process."""
+    return ImageFont.truetype(path, size)
+
+
+class ImageHandle:
+    """
+    An image decoded at most once and edited in memory.
+    
+    Pass a handle instead of a path to ImageEditingService methods to chain edits
+    (crop -> resize -> enhance) without re-decoding; each call returns a new handle,
+    and to_bytes() encodes once at the end.
+    """
+    
+    def __init__(self, source: Union[str, bytes, Image.Image], format: Optional[str] = None):
+        """
+        Wrap an image source; files and bytes are not opened until first use.
+        
+        Args:
+            source: File path, encoded image bytes, or an already-decoded Pillow image
+            format: Original format, when source is an edited image that no longer carries one
+        """
+        self.source = source
+        self._image = source if isinstance(source, Image.Image) else None
+        self._format = format or (self._image.format if self._image is not None else None)
+    
+    @property
+    def image(self) -> Image.Image:
+        """Pillow image; opening reads only the header, pixels are decoded on first access."""
+        if self._image is None:
+            fp = io.BytesIO(self.source) if isinstance(self.source, bytes) else self.source
+            self._image = Image.open(fp)
+            self._format = self._image.format
+        return self._image
+    
+    @property
+    def format(self) -> Optional[str]:
+        """Format of the original source, carried through edits."""
+        return self._format if self._image is not None else self.image.format
+    
+    def derive(self, image: Image.Image) -> "ImageHandle":
+        """New handle for an edited image, keeping this handle's source format."""
+        return ImageHandle(image, self.format)
+    
+    def to_bytes(self, format: Optional[str] = None, compress_level: int = PNG_EPHEMERAL_LEVEL) -> bytes:
+        """
+        Encode the image.
+        
+        Args:
+            format: Output format (default: JPEG/WEBP sources keep their format, others PNG)
+            compress_level: zlib level for PNG; pass PNG_PERSIST_LEVEL for output that is stored
+        
+        Returns:
+            Encoded image bytes
+        """
+        return _save_bytes(self.image, _choose_format(self.format, format), compress_level)
 
 
 class ImageEditingService:
@@ -16,39 +190,230 @@ class ImageEditingService:
             max_image_size: Maximum image file size in bytes
         """
         self.max_image_size = max_image_size
+        
+        # Loaded once here rather than on every annotate_text call
+        try:
+            self._default_font = ImageFont.load_default()
+        except Exception:
+            self._default_font = None
+        
+        # For the async a* wrappers; Pillow and libvips release the GIL while
+        # decoding, encoding and filtering, so these threads run in parallel
+        self._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="image")
+        
+        # For fetch_thumbnail
+        self.timeout = aiohttp.ClientTimeout(total=30)
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    @staticmethod
+    def _use_vips(image: Union[str, ImageHandle]) -> bool:
+        """Path inputs go through pyvips when available; handles stay in Pillow."""
+        return PYVIPS_AVAILABLE and isinstance(image, str)
+    
+    @staticmethod
+    def _open(image_path: str):
+        """Open an image with pyvips for streaming, single-pass reads."""
+        return pyvips.Image.new_from_file(image_path, access="sequential")
+    
+    @staticmethod
+    def _handle(image: Union[str, ImageHandle], cached: bool = False) -> ImageHandle:
+        """
+        Wrap the input in a handle.
+        
+        Args:
+            image: Path or existing handle (returned as is)
+            cached: Serve paths from the decode cache; by default the file is opened lazily
+        
+        Returns:
+            ImageHandle for the image
+        """
+        if isinstance(image, ImageHandle):
+            return image
+        if cached:
+            st = os.stat(image)
+            return ImageHandle(_load_decoded(image, st.st_mtime_ns, st.st_size))
+        return ImageHandle(image)
+    
+    def load(self, image_path: str) -> ImageHandle:
+        """
+        Decode a file through the shared decode cache, for callers that edit it repeatedly.
+        
+        One-off inputs (e.g. per-request temp files) should be passed as paths instead,
+        so their pixels are not kept around after the edit.
+        
+        Args:
+            image_path: Path to the image file
+        
+        Returns:
+            ImageHandle over the cached, read-only decoded image
+        """
+        return self._handle(image_path, cached=True)
+    
+    @staticmethod
+    def output_format_of(content: bytes) -> str:
+        """
+        Output format an edit of these encoded bytes produces by default (header read only).
+        
+        Args:
+            content: Encoded image bytes
+        
+        Returns:
+            Pillow-style format name; PNG if the bytes aren't a recognisable image
+        """
+        try:
+            with Image.open(io.BytesIO(content)) as img:
+                return _choose_format(img.format)
+        except Exception:
+            return "PNG"
+    
+    @staticmethod
+    def clear_cache():
+        """Drop all cached decoded images."""
+        with _decode_lock:
+            _decode_cache.clear()
+    
+    @staticmethod
+    def _result(
+        image: Union[str, ImageHandle],
+        result: ImageHandle,
+        output_format: Optional[str]
+    ) -> Union[bytes, ImageHandle]:
+        """Hand back a handle to handle callers (so edits compose); encode for path callers."""
+        if isinstance(image, ImageHandle):
+            return result
+        return result.to_bytes(output_format)
+    
+    @staticmethod
+    def _resample_filter(size: Tuple[int, int], width: int, height: int) -> int:
+        """
+        Cheapest resampling filter that still looks right for the shrink factor.
+        
+        Heavy downscales average many source pixels per output pixel anyway, so the
+        6-tap Lanczos kernel buys nothing visible over BOX/BILINEAR there.
+        """
+        scale = max(size[0] / width, size[1] / height)
+        if scale >= 4:
+            return Image.Resampling.BOX
+        if scale >= 2:
+            return Image.Resampling.BILINEAR
+        return Image.Resampling.LANCZOS
+    
+    @staticmethod
+    def _vips_format(image) -> Optional[str]:
+        """Pillow-style source format of a pyvips image, from the loader that opened it."""
+        loader = image.get("vips-loader") if image.get_typeof("vips-loader") else ""
+        if loader.startswith("jpeg"):
+            return "JPEG"
+        if loader.startswith("webp"):
+            return "WEBP"
+        return None
+    
+    @staticmethod
+    def _vips_to_bytes(image, fmt: str, compress_level: int = PNG_EPHEMERAL_LEVEL) -> bytes:
+        """Encode a pyvips result in the given Pillow-style format."""
+        if fmt == "JPEG":
+            return image.write_to_buffer(".jpg[Q=90,optimize_coding=true,interlace=true,subsample_mode=on]")
+        if fmt == "WEBP":
+            return image.write_to_buffer(".webp[Q=90]")
+        return image.write_to_buffer(f".png[compression={compress_level}]")
+    
+    @staticmethod
+    def _vips_scale(image, factor: float, offset: float = 0.0):
+        """Apply factor * px + offset to the colour bands (alpha untouched), clipped back to the source format."""
+        bands = image.bands - 1 if image.hasalpha() else image.bands
+        scale = [factor] * bands + [1.0] * (image.bands - bands)
+        shift = [offset] * bands + [0.0] * (image.bands - bands)
+        return image.linear(scale, shift).cast(image.format)
+    
+    @staticmethod
+    def _scale_table(factor: float, offset: float = 0.0) -> np.ndarray:
+        """256-entry uint8 lookup table for factor * px + offset, rounded and clipped."""
+        return np.clip(np.arange(256, dtype=np.float32) * factor + offset + 0.5, 0, 255).astype(np.uint8)
+    
+    @staticmethod
+    def _apply_lut(image: Image.Image, table: np.ndarray) -> Image.Image:
+        """Map the colour bands through table with Image.point() (alpha untouched)."""
+        colour_bands = 3 if image.mode == "RGBA" else len(image.getbands())
+        alpha = list(range(256)) if image.mode == "RGBA" else []
+        return image.point(table.tolist() * colour_bands + alpha)
+    
+    @staticmethod
+    def _mean_grey(image: Image.Image, table: Optional[np.ndarray] = None) -> int:
+        """
+        Mean grey level as ImageEnhance.Contrast computes it, optionally after a lookup table.
+        
+        Per-band means come from the histogram (one C pass), then the luma mix of
+        convert("L"). A table remaps the histogram's levels, so the mean of the mapped
+        image is known without producing it.
+        """
+        hist = np.asarray(image.histogram(), dtype=np.float64).reshape(-1, 256)
+        levels = np.arange(256) if table is None else table.astype(np.float64)
+        means = hist @ levels / (image.width * image.height)
+        mean = means[0] if image.mode == "L" else float(means[:3] @ LUMA_WEIGHTS)
+        return int(mean + 0.5)
+    
+    @classmethod
+    def _lut_scale(cls, image: Image.Image, factor: float, offset: float = 0.0) -> Image.Image:
+        """
+        Pillow counterpart of _vips_scale: factor * px + offset on the colour bands (alpha untouched).
+        
+        On 8-bit data this is a 256-entry lookup table, applied by Image.point() in one
+        C pass, instead of ImageEnhance building a degenerate image and blending.
+        """
+        return cls._apply_lut(image, cls._scale_table(factor, offset))
+    
+    @classmethod
+    def _lut_contrast(cls, image: Image.Image, factor: float) -> Image.Image:
+        """Same blend as ImageEnhance.Contrast: towards the image's mean grey level."""
+        return cls._lut_scale(image, factor, cls._mean_grey(image) * (1 - factor))
+    
+    @staticmethod
+    def _vips_crop(image, x: int, y: int, width: int, height: int):
+        """Crop, clipping the box to the image since vips rejects out-of-bounds areas."""
+        return image.crop(x, y, min(width, image.width - x), min(height, image.height - y))
+    
+    @classmethod
+    def _vips_contrast(cls, image, factor: float):
+        """Same as Pillow: blend towards the mean grey level (needs a full pass, so random access)."""
+        gray = image.extract_band(0, n=3).colourspace("b-w") if image.bands >= 3 else image.extract_band(0)
+        mean = int(gray.avg() + 0.5)
+        return cls._vips_scale(image, factor, mean * (1 - factor))
     
     def crop(
         self,
-        image_path: str,
+        image: Union[str, ImageHandle],
         x: int,
         y: int,
         width: int,
-        height: int
-    ) -> Optional[bytes]:
+        height: int,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Crop an image.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             x, y: Top-left coordinates
             width, height: Crop dimensions
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Cropped image as bytes
+            Cropped image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
+            if self._use_vips(image):
+                source = self._open(image)
+                fmt = _choose_format(self._vips_format(source), output_format)
+                return self._vips_to_bytes(self._vips_crop(source, x, y, width, height), fmt)
             
-            # Ensure coordinates are within bounds
-            box = (x, y, min(x + width, image.width), min(y + height, image.height))
-            cropped = image.crop(box)
+            handle = self._handle(image)
+            source = handle.image
             
-            # Save to bytes
-            output = io.BytesIO()
-            cropped.save(output, format='PNG')
-            output.seek(0)
+            # Ensure coordinates are within bounds
+            box = (x, y, min(x + width, source.width), min(y + height, source.height))
+            cropped = source.crop(box)
             
-            return output.getvalue()
+            return self._result(image, handle.derive(cropped), output_format)
         
         except Exception as e:
             print(f"Error cropping image: {str(e)}")
@@ -56,35 +421,54 @@ class ImageEditingService:
     
     def resize(
         self,
-        image_path: str,
+        image: Union[str, ImageHandle],
         width: int,
         height: int,
-        maintain_aspect: bool = True
-    ) -> Optional[bytes]:
+        maintain_aspect: bool = True,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Resize an image.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             width, height: New dimensions
             maintain_aspect: Keep aspect ratio
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Resized image as bytes
+            Resized image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
+            if self._use_vips(image):
+                source = self._open(image)
+                fmt = _choose_format(self._vips_format(source), output_format)
+                if maintain_aspect:
+                    # Shrink-on-load: libjpeg-turbo decodes at reduced scale; never upsizes, like Pillow
+                    resized = pyvips.Image.thumbnail(image, width, height=height, size="down")
+                else:
+                    resized = source.resize(width / source.width, vscale=height / source.height, kernel="lanczos3")
+                return self._vips_to_bytes(resized, fmt)
+            
+            handle = self._handle(image)
+            
+            if isinstance(image, str) and handle.format == "JPEG":
+                # Let libjpeg-turbo decode straight to 1/2, 1/4 or 1/8 scale from the DCT
+                # coefficients, keeping 2x headroom for the Lanczos pass. Only safe on this
+                # private, not-yet-decoded handle.
+                handle.image.draft(handle.image.mode, (width * 2, height * 2))
+            
+            # Measured after draft(), so only the shrink still left to do counts
+            resample = self._resample_filter(handle.image.size, width, height)
             
             if maintain_aspect:
-                image.thumbnail((width, height), Image.Resampling.LANCZOS)
+                # thumbnail() works in place; copy so the caller's handle is left untouched
+                resized = handle.image.copy()
+                resized.thumbnail((width, height), resample)
             else:
-                image = image.resize((width, height), Image.Resampling.LANCZOS)
-            
-            output = io.BytesIO()
-            image.save(output, format='PNG')
-            output.seek(0)
+                resized = handle.image.resize((width, height), resample)
             
-            return output.getvalue()
+            return self._result(image, handle.derive(resized), output_format)
         
         except Exception as e:
             print(f"Error resizing image: {str(e)}")
@@ -92,29 +476,35 @@ class ImageEditingService:
     
     def enhance_brightness(
         self,
-        image_path: str,
-        factor: float
-    ) -> Optional[bytes]:
+        image: Union[str, ImageHandle],
+        factor: float,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Enhance image brightness.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             factor: Brightness factor (1.0 = no change, <1 = darker, >1 = brighter)
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Enhanced image as bytes
+            Enhanced image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
-            enhancer = ImageEnhance.Brightness(image)
-            enhanced = enhancer.enhance(factor)
+            if self._use_vips(image):
+                source = self._open(image)
+                fmt = _choose_format(self._vips_format(source), output_format)
+                return self._vips_to_bytes(self._vips_scale(source, factor), fmt)
             
-            output = io.BytesIO()
-            enhanced.save(output, format='PNG')
-            output.seek(0)
+            handle = self._handle(image)
+            if handle.image.mode in LUT_ENHANCE_MODES:
+                enhanced = self._lut_scale(handle.image, factor)
+            else:
+                enhancer = ImageEnhance.Brightness(handle.image)
+                enhanced = enhancer.enhance(factor)
             
-            return output.getvalue()
+            return self._result(image, handle.derive(enhanced), output_format)
         
         except Exception as e:
             print(f"Error enhancing brightness: {str(e)}")
@@ -122,29 +512,35 @@ class ImageEditingService:
     
     def enhance_contrast(
         self,
-        image_path: str,
-        factor: float
-    ) -> Optional[bytes]:
+        image: Union[str, ImageHandle],
+        factor: float,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Enhance image contrast.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             factor: Contrast factor (1.0 = no change)
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Enhanced image as bytes
+            Enhanced image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
-            enhancer = ImageEnhance.Contrast(image)
-            enhanced = enhancer.enhance(factor)
+            if self._use_vips(image):
+                source = pyvips.Image.new_from_file(image)
+                fmt = _choose_format(self._vips_format(source), output_format)
+                return self._vips_to_bytes(self._vips_contrast(source, factor), fmt)
             
-            output = io.BytesIO()
-            enhanced.save(output, format='PNG')
-            output.seek(0)
+            handle = self._handle(image)
+            if handle.image.mode in LUT_ENHANCE_MODES:
+                enhanced = self._lut_contrast(handle.image, factor)
+            else:
+                enhancer = ImageEnhance.Contrast(handle.image)
+                enhanced = enhancer.enhance(factor)
             
-            return output.getvalue()
+            return self._result(image, handle.derive(enhanced), output_format)
         
         except Exception as e:
             print(f"Error enhancing contrast: {str(e)}")
@@ -152,107 +548,362 @@ class ImageEditingService:
     
     def enhance_sharpness(
         self,
-        image_path: str,
-        factor: float
-    ) -> Optional[bytes]:
+        image: Union[str, ImageHandle],
+        factor: float,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Enhance image sharpness.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             factor: Sharpness factor
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Enhanced image as bytes
+            Enhanced image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
-            enhancer = ImageEnhance.Sharpness(image)
+            handle = self._handle(image)
+            enhancer = ImageEnhance.Sharpness(handle.image)
             enhanced = enhancer.enhance(factor)
             
-            output = io.BytesIO()
-            enhanced.save(output, format='PNG')
-            output.seek(0)
-            
-            return output.getvalue()
+            return self._result(image, handle.derive(enhanced), output_format)
         
         except Exception as e:
             print(f"Error enhancing sharpness: {str(e)}")
             return None
     
+    def enhance(
+        self,
+        image: Union[str, ImageHandle],
+        brightness: float = 1.0,
+        contrast: float = 1.0,
+        sharpness: float = 1.0,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
+        """
+        Adjust brightness, contrast and sharpness together.
+        
+        Gives the same result as enhance_brightness, enhance_contrast and
+        enhance_sharpness applied in that order, but brightness and contrast are
+        folded into one lookup table, so the image is traversed once for both.
+        
+        Args:
+            image: Path to image, or an ImageHandle to edit in memory
+            brightness: Brightness factor (1.0 = no change)
+            contrast: Contrast factor (1.0 = no change)
+            sharpness: Sharpness factor (1.0 = no change)
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
+        
+        Returns:
+            Enhanced image as bytes (or a new ImageHandle for handle input)
+        """
+        try:
+            if self._use_vips(image) and sharpness == 1.0:
+                # libvips fuses the chained linear ops itself; contrast needs random access for its mean
+                source = pyvips.Image.new_from_file(image) if contrast != 1.0 else self._open(image)
+                fmt = _choose_format(self._vips_format(source), output_format)
+                enhanced = source
+                if brightness != 1.0:
+                    enhanced = self._vips_scale(enhanced, brightness)
+                if contrast != 1.0:
+                    enhanced = self._vips_contrast(enhanced, contrast)
+                return self._vips_to_bytes(enhanced, fmt)
+            
+            handle = self._handle(image)
+            enhanced = handle.image
+            if enhanced.mode in LUT_ENHANCE_MODES:
+                table = None
+                if brightness != 1.0:
+                    table = self._scale_table(brightness)
+                if contrast != 1.0:
+                    # Contrast of the brightened image: its mean comes from the remapped histogram
+                    mean = self._mean_grey(enhanced, table)
+                    contrast_table = self._scale_table(contrast, mean * (1 - contrast))
+                    table = contrast_table if table is None else contrast_table[table]
+                if table is not None:
+                    enhanced = self._apply_lut(enhanced, table)
+            else:
+                if brightness != 1.0:
+                    enhanced = ImageEnhance.Brightness(enhanced).enhance(brightness)
+                if contrast != 1.0:
+                    enhanced = ImageEnhance.Contrast(enhanced).enhance(contrast)
+            
+            if sharpness != 1.0:
+                enhanced = ImageEnhance.Sharpness(enhanced).enhance(sharpness)
+            
+            return self._result(image, handle.derive(enhanced), output_format)
+        
+        except Exception as e:
+            print(f"Error enhancing image: {str(e)}")
+            return None
+    
     def annotate_text(
         self,
-        image_path: str,
+        image: Union[str, ImageHandle],
         text: str,
         x: int,
         y: int,
-        text_color: Tuple[int, int, int] = (255, 0, 0)
-    ) -> Optional[bytes]:
+        text_color: Tuple[int, int, int] = (255, 0, 0),
+        font_path: Optional[str] = None,
+        font_size: int = 16,
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """
         Add text annotation to image.
         
         Args:
-            image_path: Path to image
+            image: Path to image, or an ImageHandle to edit in memory
             text: Text to add
             x, y: Position coordinates
             text_color: RGB color tuple
+            font_path: TrueType/OpenType font file (default: Pillow's built-in font)
+            font_size: Font size in points, used with font_path
+            output_format: Output format for path inputs (default: JPEG/WEBP sources keep their format, others PNG)
         
         Returns:
-            Annotated image as bytes
+            Annotated image as bytes (or a new ImageHandle for handle input)
         """
         try:
-            image = Image.open(image_path)
-            draw = ImageDraw.Draw(image)
+            handle = self._handle(image)
+            # Drawing is in place; copy so the caller's handle is left untouched
+            annotated = handle.image.copy()
+            draw = ImageDraw.Draw(annotated)
             
-            # Use default font
-            try:
-                font = ImageFont.load_default()
-            except:
-                font = None
+            font = _load_font(font_path, font_size) if font_path else self._default_font
             
             draw.text((x, y), text, fill=text_color, font=font)
             
-            output = io.BytesIO()
-            image.save(output, format='PNG')
-            output.seek(0)
-            
-            return output.getvalue()
+            return self._result(image, handle.derive(annotated), output_format)
         
         except Exception as e:
             print(f"Error annotating image: {str(e)}")
             return None
     
-    def grayscale(self, image_path: str) -> Optional[bytes]:
+    def grayscale(
+        self,
+        image: Union[str, ImageHandle],
+        output_format: Optional[str] = None
+    ) -> Union[bytes, ImageHandle, None]:
         """Convert image to grayscale."""
         try:
-            image = Image.open(image_path)
-            gray = image.convert('L')
-            
-            output = io.BytesIO()
-            gray.save(output, format='PNG')
-            output.seek(0)
+            handle = self._handle(image)
+            gray = handle.image.convert('L')
             
-            return output.getvalue()
+            return self._result(image, handle.derive(gray), output_format)
         
         except Exception as e:
             print(f"Error converting to grayscale: {str(e)}")
             return None
     
-    def get_image_info(self, image_path: str) -> Optional[Dict[str, Any]]:
+    def get_image_info(self, image: Union[str, ImageHandle]) -> Optional[Dict[str, Any]]:
         """Get image information."""
         try:
-            image = Image.open(image_path)
+            # Header-only open; no need to decode the pixels
+            handle = self._handle(image)
+            path = handle.source if isinstance(handle.source, str) else None
             return {
-                "width": image.width,
-                "height": image.height,
-                "format": image.format,
-                "mode": image.mode,
-                "size": os.path.getsize(image_path) if os.path.exists(image_path) else 0,
+                "width": handle.image.width,
+                "height": handle.image.height,
+                "format": handle.format,
+                "mode": handle.image.mode,
+                "size": os.path.getsize(path) if path and os.path.exists(path) else 0,
             }
         except Exception as e:
             print(f"Error getting image info: {str(e)}")
             return None
 
+    
+    def batch_process(
+        self,
+        paths: List[str],
+        ops: List[Tuple[str, Dict[str, Any]]],
+        output_format: Optional[str] = None
+    ) -> List[Optional[bytes]]:
+        """
+        Apply the same chain of edits to many images in parallel.
+        
+        With pyvips the chain is built lazily and streamed through in one sweep per
+        image, so a full raster is never held in memory; otherwise each image is
+        decoded once and edited through an ImageHandle.
+        
+        Args:
+            paths: Image file paths
+            ops: (method name, keyword arguments) pairs, e.g. [("resize", {"width": 200, "height": 200})]
+            output_format: Output format (default: JPEG/WEBP sources keep their format, others PNG)
+        
+        Returns:
+            Encoded image (or None on failure) per path, in input order
+        """
+        unknown = [name for name, _ in ops if name not in BATCH_OPS]
+        if unknown:
+            print(f"Unsupported batch operations: {unknown}")
+            return [None] * len(paths)
+        if not paths:
+            return []
+        
+        use_vips = PYVIPS_AVAILABLE and all(name in VIPS_BATCH_OPS for name, _ in ops)
+        process = self._vips_batch_one if use_vips else self._batch_one
+        # libvips and Pillow's codecs release the GIL, so threads run in parallel
+        with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+            return list(executor.map(lambda path: process(path, ops, output_format), paths))
+    
+    def _batch_one(self, path: str, ops: List[Tuple[str, Dict[str, Any]]], output_format: Optional[str]) -> Optional[bytes]:
+        """Pillow route for one batch item: decode once, chain the edits on a handle, encode."""
+        handle = ImageHandle(path)
+        for name, kwargs in ops:
+            handle = getattr(self, name)(handle, **kwargs)
+            if handle is None:
+                return None
+        try:
+            return handle.to_bytes(output_format)
+        except Exception as e:
+            print(f"Error encoding {path}: {str(e)}")
+            return None
+    
+    def _vips_batch_one(self, path: str, ops: List[Tuple[str, Dict[str, Any]]], output_format: Optional[str]) -> Optional[bytes]:
+        """pyvips route for one batch item: build the lazy pipeline, then stream it out."""
+        try:
+            # A contrast step reads the whole image for its mean, which sequential access can't rewind
+            access = "random" if any(name == "enhance_contrast" for name, _ in ops) else "sequential"
+            image = pyvips.Image.new_from_file(path, access=access)
+            fmt = _choose_format(self._vips_format(image), output_format)
+            
+            for name, kwargs in ops:
+                if name == "crop":
+                    image = self._vips_crop(image, **kwargs)
+                elif name == "resize":
+                    width, height = kwargs["width"], kwargs["height"]
+                    if kwargs.get("maintain_aspect", True):
+                        image = image.thumbnail_image(width, height=height, size="down")
+                    else:
+                        image = image.resize(width / image.width, vscale=height / image.height, kernel="lanczos3")
+                elif name == "enhance_brightness":
+                    image = self._vips_scale(image, kwargs["factor"])
+                elif name == "enhance_contrast":
+                    image = self._vips_contrast(image, kwargs["factor"])
+                elif name == "grayscale":
+                    image = image.colourspace("b-w")
+            
+            # Nothing has been computed yet; encoding pulls pixels through the whole chain
+            return self._vips_to_bytes(image, fmt)
+        
+        except Exception as e:
+            print(f"Error processing {path}: {str(e)}")
+            return None
+    
+    # ============= ASYNC WRAPPERS =============
+    # Same arguments and results as the blocking methods, run on the image thread
+    # pool so async routes don't stall the event loop on decode/encode.
+    
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+    
+    async def acrop(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.crop, *args, **kwargs)
+    
+    async def aresize(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.resize, *args, **kwargs)
+    
+    async def aenhance(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.enhance, *args, **kwargs)
+    
+    async def aenhance_brightness(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.enhance_brightness, *args, **kwargs)
+    
+    async def aenhance_contrast(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.enhance_contrast, *args, **kwargs)
+    
+    async def aenhance_sharpness(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.enhance_sharpness, *args, **kwargs)
+    
+    async def aannotate_text(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.annotate_text, *args, **kwargs)
+    
+    async def agrayscale(self, *args, **kwargs) -> Union[bytes, ImageHandle, None]:
+        return await self._run(self.grayscale, *args, **kwargs)
+    
+    async def abatch_process(self, *args, **kwargs) -> List[Optional[bytes]]:
+        # batch_process fans out on its own pool; this only keeps the wait off the loop
+        return await asyncio.to_thread(self.batch_process, *args, **kwargs)
+    
+    # ============= REMOTE IMAGES =============
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Keep-alive session, created on first use inside the app's event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+    
+    async def close(self):
+        """Close the HTTP session (call on app shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+    
+    async def fetch_thumbnail(self, url: str, max_dim: int) -> Optional[ImageHandle]:
+        """
+        Download an image and shrink it to fit within max_dim x max_dim.
+        
+        The header is parsed from the first chunks while the rest is still arriving,
+        so non-images and decompression bombs are dropped without downloading them,
+        and the size is known before any pixels are decoded.
+        
+        Args:
+            url: Image URL
+            max_dim: Longest side of the thumbnail in pixels
+        
+        Returns:
+            ImageHandle for the thumbnail (keeping the source format), or None on failure
+        """
+        try:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                if (response.content_length or 0) > self.max_image_size:
+                    print(f"Image too large: {url}")
+                    return None
+                
+                parser = ImageFile.Parser()
+                size = None
+                buffer = io.BytesIO()
+                async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+                    buffer.write(chunk)
+                    if buffer.tell() > self.max_image_size:
+                        print(f"Image too large: {url}")
+                        return None
+                    if size is None:
+                        # Only fed until the header parses; the pixels are decoded once, below
+                        parser.feed(chunk)
+                        if parser.image is not None:
+                            size = parser.image.size
+                            if Image.MAX_IMAGE_PIXELS and size[0] * size[1] > Image.MAX_IMAGE_PIXELS:
+                                print(f"Image has too many pixels: {url} {size}")
+                                return None
+            
+            if size is None:
+                print(f"Not an image: {url}")
+                return None
+            return await self._run(self._thumbnail, buffer.getvalue(), max_dim)
+        
+        except Exception as e:
+            print(f"Error fetching thumbnail: {str(e)}")
+            return None
+    
+    def _thumbnail(self, data: bytes, max_dim: int) -> ImageHandle:
+        """Decode downloaded bytes, downscaling only when the image exceeds max_dim."""
+        image = Image.open(io.BytesIO(data))
+        fmt = image.format
+        if max(image.size) > max_dim:
+            if fmt == "JPEG":
+                # Decode at 1/2, 1/4 or 1/8 scale from the DCT coefficients, keeping 2x headroom
+                image.draft(image.mode, (max_dim * 2, max_dim * 2))
+            image.thumbnail((max_dim, max_dim), self._resample_filter(image.size, max_dim, max_dim))
+        else:
+            image.load()
+        return ImageHandle(image, fmt)
+
 
 # Global image editing service instance
 image_edit_service = ImageEditingService()
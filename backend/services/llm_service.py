@@ -1,9 +1,47 @@
 """Multi-provider LLM service supporting Anthropic, OpenAI, and Google Gemini."""
 import os
+import hashlib
+import httpx
+import orjson
+from cachetools import TTLCache
 from typing import Optional, List, Dict, Any
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, NOT_GIVEN
 from utils.config import config
 
+# tiktoken is optional; without it count_tokens falls back to ~4 characters per token
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# One HTTP/2 connection pool shared by the provider SDK clients, so bursts of
+# requests reuse warm TLS connections (timeouts match the SDK defaults)
+_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(600.0, connect=5.0),
+)
+
+# Only near-deterministic calls are cached; higher temperatures are meant to vary
+CACHE_MAX_TEMPERATURE = 0.05
+
+
+def _claude_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Messages for Claude (system goes separately); plain {role, content} dicts are passed through uncopied."""
+    return [
+        msg if len(msg) == 2 and "content" in msg else {"role": msg["role"], "content": msg["content"]}
+        for msg in messages
+        if msg["role"] != "system"
+    ]
+
+
+def _openai_messages(messages: List[Dict[str, str]], system_prompt: Optional[str]) -> List[Dict[str, str]]:
+    """Chat Completions messages: the system prompt first, then {role, content} per message."""
+    openai_messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    openai_messages.extend({"role": msg["role"], "content": msg["content"]} for msg in messages)
+    return openai_messages
+
 
 class MultiLLMService:
     """Wrapper for multiple LLM providers with unified interface."""
@@ -18,6 +56,9 @@ class MultiLLMService:
         """
         self.provider = provider or config.LLM_PROVIDER
         self.tokens_used = 0
+        self._encoding = None  # tiktoken encoding, loaded on first count_tokens()
+        # Responses to temperature ~0 calls, keyed by a hash of the full request
+        self._response_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
         
         # Default models per provider (from config)
         default_models = {
@@ -34,12 +75,11 @@ class MultiLLMService:
         
         # Initialize provider clients
         if self.provider == "anthropic":
-            self.client = AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+            self.client = AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY, http_client=_http_client)
         elif self.provider == "openai":
             try:
-                import openai
-                openai.api_key = config.OPENAI_API_KEY
-                self.client = openai
+                from openai import AsyncOpenAI
+                self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, http_client=_http_client)
             except ImportError:
                 raise ImportError("openai package not installed. Run: pip install openai")
         elif self.provider == "gemini":
@@ -69,15 +109,26 @@ class MultiLLMService:
             max_tokens: Maximum tokens in response
         
         Returns:
-            Dict with 'response' and 'tokens_used'
+            Dict with 'response' and 'tokens_used' ('from_cache' is True on a cache hit)
         """
+        cache_key = None
+        if temperature < CACHE_MAX_TEMPERATURE:
+            cache_key = self._cache_key(messages, system_prompt, temperature, max_tokens)
+            cached = self._response_cache.get(cache_key)
+            if cached:
+                return {**cached, "tokens_used": 0, "from_cache": True}
+        
         try:
             if self.provider == "anthropic":
-                return await self._generate_anthropic(messages, system_prompt, temperature, max_tokens)
+                result = await self._generate_anthropic(messages, system_prompt, temperature, max_tokens)
             elif self.provider == "openai":
-                return await self._generate_openai(messages, system_prompt, temperature, max_tokens)
+                result = await self._generate_openai(messages, system_prompt, temperature, max_tokens)
             elif self.provider == "gemini":
-                return await self._generate_gemini(messages, system_prompt, temperature, max_tokens)
+                result = await self._generate_gemini(messages, system_prompt, temperature, max_tokens)
+            
+            if cache_key:
+                self._response_cache[cache_key] = result
+            return result
         except Exception as e:
             return {
                 "response": f"Error generating response: {str(e)}",
@@ -85,15 +136,24 @@ class MultiLLMService:
                 "error": str(e),
             }
     
+    def _cache_key(self, messages, system_prompt, temperature, max_tokens) -> str:
+        """BLAKE2b digest of everything that determines the response."""
+        payload = orjson.dumps(
+            {
+                "provider": self.provider,
+                "model": self.model,
+                "messages": messages,
+                "system": system_prompt,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
     async def _generate_anthropic(self, messages, system_prompt, temperature, max_tokens):
         """Generate response using Anthropic Claude."""
-        claude_messages = []
-        for msg in messages:
-            if msg["role"] != "system":
-                claude_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+        claude_messages = _claude_messages(messages)
         
         response = await self.client.messages.create(
             model=self.model,
@@ -117,22 +177,9 @@ class MultiLLMService:
     
     async def _generate_openai(self, messages, system_prompt, temperature, max_tokens):
         """Generate response using OpenAI."""
-        import openai
-        
-        # Prepare messages
-        openai_messages = []
-        if system_prompt:
-            openai_messages.append({"role": "system", "content": system_prompt})
-        
-        for msg in messages:
-            openai_messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        response = await openai.ChatCompletion.acreate(
+        response = await self.client.chat.completions.create(
             model=self.model,
-            messages=openai_messages,
+            messages=_openai_messages(messages, system_prompt),
             temperature=temperature,
             max_tokens=max_tokens,
         )
@@ -153,16 +200,14 @@ class MultiLLMService:
         """Generate response using Google Gemini."""
         import google.generativeai as genai
         
-        # Prepare prompt
-        full_prompt = ""
-        if system_prompt:
-            full_prompt += f"{system_prompt}\n\n"
-        
-        for msg in messages:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            full_prompt += f"{role}: {msg['content']}\n\n"
-        
-        full_prompt += "Assistant:"
+        # Prepare prompt (collect parts and join once instead of growing a string)
+        parts = [system_prompt] if system_prompt else []
+        parts.extend(
+            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+            for msg in messages
+        )
+        parts.append("Assistant:")
+        full_prompt = "\n\n".join(parts)
         
         model = genai.GenerativeModel(self.model)
         response = await model.generate_content_async(
@@ -194,32 +239,57 @@ class MultiLLMService:
     ):
         """
         Stream response tokens as they're generated.
-        Only Anthropic supports streaming currently.
+        Anthropic and OpenAI stream; Gemini returns the full response as one chunk.
         """
         try:
             if self.provider == "anthropic":
-                claude_messages = []
-                for msg in messages:
-                    if msg["role"] != "system":
-                        claude_messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"]
-                        })
+                claude_messages = _claude_messages(messages)
                 
-                async with self.client.messages.stream(
+                # Raw server-sent events: unlike messages.stream(), nothing accumulates a
+                # snapshot of the whole message, and usage comes from the events themselves
+                stream = await self.client.messages.create(
                     model=self.model,
                     system=system_prompt if system_prompt else None,
                     messages=claude_messages,
                     temperature=temperature,
                     max_tokens=max_tokens,
-                ) as stream:
-                    async for text in stream.text_stream:
+                    stream=True,
+                )
+                
+                input_tokens = output_tokens = 0
+                async for event in stream:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield event.delta.text
+                    elif event.type == "message_start":
+                        input_tokens = event.message.usage.input_tokens
+                    elif event.type == "message_delta":
+                        # Running total, not an increment
+                        output_tokens = event.usage.output_tokens
+                
+                tokens_used = input_tokens + output_tokens
+                self.tokens_used += tokens_used
+                config.USAGE_STATS['total_tokens'] += tokens_used
+            elif self.provider == "openai":
+                openai_messages = _openai_messages(messages, system_prompt)
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=openai_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                
+                chunks = []
+                async for event in stream:
+                    text = event.choices[0].delta.content if event.choices else None
+                    if text:
+                        chunks.append(text)
                         yield text
-                    
-                    final_message = await stream.get_final_message()
-                    tokens_used = final_message.usage.input_tokens + final_message.usage.output_tokens
-                    self.tokens_used += tokens_used
-                    config.USAGE_STATS['total_tokens'] += tokens_used
+                
+                # Streamed chunks carry no usage; count with the model's own tokenizer
+                tokens_used = sum(self.count_tokens(m["content"]) for m in openai_messages) + self.count_tokens("".join(chunks))
+                self.tokens_used += tokens_used
+                config.USAGE_STATS['total_tokens'] += tokens_used
             else:
                 # Fallback: non-streaming for other providers
                 result = await self.generate_response(messages, system_prompt, temperature, max_tokens)
@@ -228,9 +298,67 @@ class MultiLLMService:
         except Exception as e:
             yield f"\n\nError: {str(e)}"
     
+    def _get_encoding(self):
+        """tiktoken encoding for self.model, loaded once (False if tiktoken can't provide one)."""
+        if self._encoding is None:
+            if not TIKTOKEN_AVAILABLE:
+                self._encoding = False
+                return self._encoding
+            try:
+                name = tiktoken.encoding_name_for_model(self.model)
+            except KeyError:
+                # Not an OpenAI model: cl100k_base is still a far closer estimate than chars / 4
+                name = "cl100k_base"
+            try:
+                self._encoding = tiktoken.get_encoding(name)
+            except Exception as e:
+                # Encodings are downloaded on first use; don't retry on every call
+                print(f"⚠️ Token counter unavailable, using estimate: {e}")
+                self._encoding = False
+        return self._encoding
+    
     def count_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)."""
-        return len(text) // 4
+        """
+        Count tokens in text with a BPE tokenizer.
+        
+        Exact for OpenAI models; an estimate for other providers (use
+        count_message_tokens for an exact Anthropic count).
+        """
+        encoding = self._get_encoding()
+        if not encoding:
+            return len(text) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    async def count_message_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+    ) -> int:
+        """
+        Input tokens a request would use.
+        
+        Anthropic counts server-side with the model's own tokenizer; other
+        providers (or a failed count) sum count_tokens over the contents.
+        """
+        if self.provider == "anthropic":
+            try:
+                result = await self.client.beta.messages.count_tokens(
+                    model=self.model,
+                    system=system_prompt or NOT_GIVEN,
+                    messages=_claude_messages(messages),
+                )
+                return result.input_tokens
+            except Exception as e:
+                print(f"⚠️ Anthropic token count failed, using estimate: {e}")
+        
+        total = sum(self.count_tokens(m["content"]) for m in messages)
+        if system_prompt:
+            total += self.count_tokens(system_prompt)
+        return total
+    
+    async def close(self):
+        """Close the shared connection pool (call on app shutdown)."""
+        await _http_client.aclose()
     
     def get_token_usage(self) -> Dict[str, Any]:
         """Get token usage statistics."""
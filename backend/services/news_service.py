@@ -1,7 +1,7 @@
 """News aggregation and summarization service."""
 from typing import List, Dict, Any, Optional
 import aiohttp
-import requests
+import orjson
 from utils.config import config
 from utils.cache import cache_news, get_cached_news
 
@@ -18,8 +18,22 @@ class NewsService:
         """
         self.api_key = api_key or config.NEWS_API_KEY
         self.base_url = "https://newsapi.org/v2"
+        self.timeout = aiohttp.ClientTimeout(total=10)
+        self._session: Optional[aiohttp.ClientSession] = None
     
-    def get_top_headlines(
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Keep-alive session, created on first use inside the app's event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+    
+    async def close(self):
+        """Close the HTTP session (call on app shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+    
+    async def get_top_headlines(
         self,
         category: Optional[str] = None,
         country: str = "us",
@@ -55,27 +69,25 @@ class NewsService:
             if category:
                 params["category"] = category
             
-            response = requests.get(
-                f"{self.base_url}/top-headlines",
-                params=params,
-                timeout=10
-            )
+            async with self.session.get(f"{self.base_url}/top-headlines", params=params) as response:
+                status = response.status
+                body = await response.read()
             
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", [])
+            if status == 200:
+                data = orjson.loads(body)
                 
-                # Extract relevant fields
-                headlines = []
-                for article in articles[:limit]:
-                    headlines.append({
+                # Extract relevant fields (pageSize already caps the article count)
+                headlines = [
+                    {
                         "title": article.get("title"),
                         "description": article.get("description"),
                         "url": article.get("url"),
                         "image": article.get("urlToImage"),
-                        "source": article.get("source", {}).get("name"),
+                        "source": (article.get("source") or {}).get("name"),
                         "published_at": article.get("publishedAt"),
-                    })
+                    }
+                    for article in data.get("articles") or []
+                ]
                 
                 cache_news(cache_key, headlines)
                 
@@ -85,7 +97,7 @@ class NewsService:
                     "from_cache": False,
                 }
             else:
-                print(f"NewsAPI error: {response.status_code}")
+                print(f"NewsAPI error: {status}")
                 return None
         
         except Exception as e:
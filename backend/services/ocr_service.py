@@ -1,9 +1,34 @@
 """OCR service for image text extraction."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from hashlib import blake2b
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
+import asyncio
 import io
+import mmap
 import os
+import queue
+import threading
+from services import OCR_POOL
+from services.document_workers import extract_image_text
+from utils.cache import cache_ocr_text, get_cached_ocr_text
+
+# Tesseract's OpenMP threads would oversubscribe the CPU when we OCR several
+# images at once; must be set before libtesseract is loaded
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# tesserocr (in-process libtesseract) is optional; pytesseract runs the CLI per call
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Longest side handed to Tesseract; an A4 page at 300 dpi is ~3500px, and text
+# stays legible well below that while the pixel count (and OCR time) halves
+OCR_MAX_DIM = 2400
 
 
 class OCRService:
@@ -11,7 +36,14 @@ class OCRService:
     
     def __init__(self):
         """Initialize OCR service."""
+        # Idle tesserocr APIs per language; each keeps its traineddata loaded between calls
+        self._apis: Dict[str, queue.SimpleQueue] = {}
+        self._apis_lock = threading.Lock()
+        
         # Check if Tesseract is installed
+        if TESSEROCR_AVAILABLE:
+            self.available = True
+            return
         try:
             pytesseract.get_tesseract_version()
             self.available = True
@@ -19,10 +51,56 @@ class OCRService:
             self.available = False
             print("Warning: Tesseract OCR not available. Install with: apt-get install tesseract-ocr")
     
+    @contextmanager
+    def _api(self, language: str):
+        """Borrow a tesserocr API for the language, creating one if all are busy."""
+        with self._apis_lock:
+            pool = self._apis.setdefault(language, queue.SimpleQueue())
+        try:
+            api = pool.get_nowait()
+        except queue.Empty:
+            api = tesserocr.PyTessBaseAPI(lang=language)
+        try:
+            yield api
+        finally:
+            pool.put(api)
+    
+    @staticmethod
+    def _prepare(image: Image.Image, color: bool = False) -> Image.Image:
+        """Greyscale, stretch contrast and downscale an image before OCR (color=True keeps RGB)."""
+        if color:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+        elif image.mode != 'L':
+            image = ImageOps.autocontrast(image.convert('L'))
+        if max(image.size) > OCR_MAX_DIM:
+            image.thumbnail((OCR_MAX_DIM, OCR_MAX_DIM), Image.Resampling.LANCZOS)
+        return image
+    
+    @staticmethod
+    def _cache_key(data, language: str, color: bool) -> str:
+        """Cache key for an image's OCR text: its content hash plus what changes the output."""
+        return f"{language}:{'rgb' if color else 'l'}:{blake2b(data, digest_size=20).hexdigest()}"
+    
+    def _lookup(self, image_path: str, language: str, color: bool = False) -> Tuple[str, Optional[str]]:
+        """Cache key of an image file (hashed through a read-only mapping) and its cached text, if any."""
+        with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            key = self._cache_key(data, language, color)
+        return key, get_cached_ocr_text(key)
+    
+    def _image_to_string(self, image: Image.Image, language: str) -> str:
+        """Recognise an image in-process with a pooled API, or through the tesseract CLI."""
+        if TESSEROCR_AVAILABLE:
+            with self._api(language) as api:
+                api.SetImage(image)
+                return api.GetUTF8Text()
+        return pytesseract.image_to_string(image, lang=language)
+    
     def extract_text(
         self,
         image_path: str,
-        language: str = "eng"
+        language: str = "eng",
+        color: bool = False
     ) -> Optional[str]:
         """
         Extract text from image file.
@@ -30,6 +108,43 @@ class OCRService:
         Args:
             image_path: Path to image file
             language: Language code for Tesseract (eng, hin, asm for Assamese)
+            color: Keep colour instead of greyscaling the image first
+        
+        Returns:
+            Extracted text or None
+        """
+        if not self.available:
+            return None
+        
+        try:
+            # Same image, same text
+            key, cached = self._lookup(image_path, language, color)
+            if cached is not None:
+                return cached
+        
+        except Exception as e:
+            print(f"Error extracting OCR text: {str(e)}")
+            return None
+        
+        text = self.extract_text_uncached(image_path, language, color)
+        if text is not None:
+            cache_ocr_text(key, text)
+        return text
+    
+    def extract_text_uncached(
+        self,
+        image_path: str,
+        language: str = "eng",
+        color: bool = False
+    ) -> Optional[str]:
+        """
+        extract_text without the result cache; OCR_POOL workers run this and the
+        submitting process does the caching.
+        
+        Args:
+            image_path: Path to image file
+            language: Language code for Tesseract (eng, hin, asm for Assamese)
+            color: Keep colour instead of greyscaling the image first
         
         Returns:
             Extracted text or None
@@ -41,23 +156,88 @@ class OCRService:
             # Open image
             image = Image.open(image_path)
             
-            # Convert to RGB if needed
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
+            # Greyscale and downscale before recognition
+            image = self._prepare(image, color)
             
             # Extract text with language support
-            text = pytesseract.image_to_string(image, lang=language)
-            
-            return text.strip()
+            return self._image_to_string(image, language).strip()
         
         except Exception as e:
             print(f"Error extracting OCR text: {str(e)}")
             return None
     
+    def extract_text_batch(
+        self,
+        paths: List[str],
+        language: str = "eng",
+        max_workers: Optional[int] = None
+    ) -> List[Optional[str]]:
+        """
+        Extract text from many image files in parallel threads.
+        
+        Threads run truly in parallel here: libtesseract (tesserocr) releases the GIL,
+        and pytesseract spends its time waiting on a tesseract process.
+        
+        Args:
+            paths: Paths to image files
+            language: Language code for Tesseract (eng, hin, asm for Assamese)
+            max_workers: Thread count (default: CPU count); more than the cores only thrashes
+        
+        Returns:
+            Extracted text (or None on failure) per path, in input order
+        """
+        if not paths:
+            return []
+        workers = min(max_workers or os.cpu_count() or 1, len(paths))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as executor:
+            return list(executor.map(lambda path: self.extract_text(path, language), paths))
+    
+    async def extract_text_async(
+        self,
+        paths: List[str],
+        language: str = "eng"
+    ) -> List[Optional[str]]:
+        """
+        Extract text from several image files concurrently.
+        
+        Cached results are served here; the remaining images are decoded, prepared and
+        recognised in OCR_POOL worker processes (see services.document_workers), so the
+        event loop is never blocked and up to OCR_WORKERS images are recognised in parallel.
+        
+        Args:
+            paths: Paths to image files
+            language: Language code for Tesseract (eng, hin, asm for Assamese)
+        
+        Returns:
+            Extracted text (or None on failure) per path, in input order
+        """
+        if not self.available:
+            return [None] * len(paths)
+        
+        loop = asyncio.get_running_loop()
+        
+        async def one(path: str) -> Optional[str]:
+            # Hashing and the cache lookup block, so they run in a thread; only misses reach the pool
+            try:
+                key, cached = await asyncio.to_thread(self._lookup, path, language)
+            except Exception as e:
+                print(f"Error extracting OCR text: {str(e)}")
+                return None
+            if cached is not None:
+                return cached
+            
+            text = await loop.run_in_executor(OCR_POOL, extract_image_text, path, language)
+            if text is not None:
+                await asyncio.to_thread(cache_ocr_text, key, text)
+            return text
+        
+        return await asyncio.gather(*(one(path) for path in paths))
+    
     def extract_text_from_bytes(
         self,
         image_bytes: bytes,
-        language: str = "eng"
+        language: str = "eng",
+        color: bool = False
     ) -> Optional[str]:
         """
         Extract text from image bytes.
@@ -65,6 +245,37 @@ class OCRService:
         Args:
             image_bytes: Image file as bytes
             language: Language code
+            color: Keep colour instead of greyscaling the image first
+        
+        Returns:
+            Extracted text
+        """
+        if not self.available:
+            return None
+        
+        key = self._cache_key(image_bytes, language, color)
+        cached = get_cached_ocr_text(key)
+        if cached is not None:
+            return cached
+        
+        text = self.extract_text_from_bytes_uncached(image_bytes, language, color)
+        if text is not None:
+            cache_ocr_text(key, text)
+        return text
+    
+    def extract_text_from_bytes_uncached(
+        self,
+        image_bytes: bytes,
+        language: str = "eng",
+        color: bool = False
+    ) -> Optional[str]:
+        """
+        extract_text_from_bytes without the result cache, for OCR_POOL workers.
+        
+        Args:
+            image_bytes: Image file as bytes
+            language: Language code
+            color: Keep colour instead of greyscaling the image first
         
         Returns:
             Extracted text
@@ -76,13 +287,10 @@ class OCRService:
             # Load from bytes
             image = Image.open(io.BytesIO(image_bytes))
             
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
+            image = self._prepare(image, color)
             
             # Extract text
-            text = pytesseract.image_to_string(image, lang=language)
-            
-            return text.strip()
+            return self._image_to_string(image, language).strip()
         
         except Exception as e:
             print(f"Error extracting OCR text from bytes: {str(e)}")
@@ -91,7 +299,8 @@ class OCRService:
     def extract_text_with_boxes(
         self,
         image_path: str,
-        language: str = "eng"
+        language: str = "eng",
+        color: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Extract text with bounding box information.
@@ -99,29 +308,40 @@ class OCRService:
         Args:
             image_path: Path to image
             language: Language code
+            color: Keep colour instead of greyscaling the image first
         
         Returns:
-            Dictionary with text and box data
+            Dictionary with text and box data (box coordinates are in the
+            prepared image, i.e. scaled down if a side exceeded OCR_MAX_DIM)
         """
         if not self.available:
             return None
         
         try:
             image = Image.open(image_path)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
+            image = self._prepare(image, color)
             
             # Get data with bounding boxes
             data = pytesseract.image_to_data(image, lang=language, output_type=pytesseract.Output.DICT)
             
-            # Extract text
-            text = pytesseract.image_to_string(image, lang=language)
+            # Rebuild the text from the recognised words (one line per Tesseract line)
+            # instead of running a second OCR pass; conf is -1 for non-word rows
+            lines: Dict[tuple, List[str]] = {}
+            confs = []
+            for i, word in enumerate(data['text']):
+                conf = float(data['conf'][i])
+                if conf > 0:
+                    confs.append(conf)
+                    if word.strip():
+                        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                        lines.setdefault(key, []).append(word)
+            text = "\n".join(" ".join(words) for words in lines.values())
             
             return {
                 "text": text.strip(),
                 "boxes": data,
                 "confidence": {
-                    "mean": sum(int(c) for c in data['conf'] if int(c) > 0) / max(len([c for c in data['conf'] if int(c) > 0]), 1),
+                    "mean": sum(confs) / max(len(confs), 1),
                 }
             }
         
@@ -156,6 +376,7 @@ class OCRService:
             "eng",    # English
             "hin",    # Hindi
             "asm",    # Assamese
+            "ben",    # Bengali
         ]
 
 
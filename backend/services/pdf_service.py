@@ -1,10 +1,41 @@
 """PDF processing service for document ingestion and Q&A."""
 from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+from functools import lru_cache
+from hashlib import blake2b
+import mmap
 import os
+import re
 from pathlib import Path
 import fitz  # PyMuPDF
+from services import OCR_POOL
+from services.document_workers import extract_page_range
 from services.embedding_service import embedding_service
 from services.vector_store import vector_store
+from utils.cache import cache_pdf_ocr_pages, get_cached_pdf_ocr_pages
+
+# Chunks embedded and inserted together by process_pdf
+EMBED_BATCH_SIZE = 32
+
+# PDFs shorter than this are read in-process by extract_text_from_pdf; shipping page
+# ranges to worker processes would cost more than it saves
+PARALLEL_MIN_PAGES = 8
+
+# A paragraph: a run of non-empty lines, ended by a blank line (or the end of the page)
+_PARA = re.compile(r"[^\n]+(?:\n(?!\n)[^\n]+)*")
+
+
+@lru_cache(maxsize=256)
+def _page_count(file_path: str, mtime_ns: int, size: int) -> int:
+    """Page count of a file version; mtime_ns and size are part of the key so edits miss the cache."""
+    with fitz.open(file_path, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def _ocr_cache_key(file_path: str, ocr_language: str) -> str:
+    """Cache key for a PDF's scanned-page OCR text: its content hash (read through a mapping) and the language."""
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return f"pdf:{ocr_language}:{blake2b(data, digest_size=20).hexdigest()}"
 
 
 class PDFService:
@@ -21,66 +52,160 @@ class PDFService:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
     
-    def extract_text_from_pdf(self, file_path: str) -> Optional[str]:
+    def extract_text_from_pdf(
+        self,
+        file_path: str,
+        num_workers: int = min(os.cpu_count() or 1, 4),
+        ocr_language: str = "eng"
+    ) -> Optional[List[Tuple[int, str]]]:
         """
-        Extract text from PDF file.
+        Extract text from PDF file, page by page.
+        
+        Pages are independent, so longer PDFs are split into contiguous page ranges
+        read by OCR_POOL worker processes (MuPDF serialises threads on a global lock).
+        OCR text of scanned pages is cached here, by PDF content, not in the workers.
         
         Args:
             file_path: Path to PDF file
+            num_workers: Page ranges to split PDFs of PARALLEL_MIN_PAGES pages or more into
+            ocr_language: Tesseract language code for scanned pages
         
         Returns:
-            Extracted text or None if error
+            List of (page_number, page_text) tuples, page numbers from 1; None if error
         """
         try:
-            doc = fitz.open(file_path)
-            text = ""
+            ranges = self._page_ranges(file_path, num_workers, ocr_language)
+            key = _ocr_cache_key(file_path, ocr_language)
+            known = get_cached_pdf_ocr_pages(key)
+            if len(ranges) > 1:
+                parts = OCR_POOL.map(extract_page_range, *zip(*ranges), [known] * len(ranges))
+            else:
+                parts = [extract_page_range(*r, known) for r in ranges]
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text += f"\n--- Page {page_num + 1} ---\n"
-                text += page.get_text()
+            return self._join_parts(key, known, parts)
+        
+        except Exception as e:
+            print(f"Error extracting PDF text: {str(e)}")
+            return None
+    
+    async def extract_text_from_pdf_async(
+        self,
+        file_path: str,
+        num_workers: int = min(os.cpu_count() or 1, 4),
+        ocr_language: str = "eng"
+    ) -> Optional[List[Tuple[int, str]]]:
+        """
+        extract_text_from_pdf with every page range read in OCR_POOL, off the event loop.
+        
+        Args:
+            file_path: Path to PDF file
+            num_workers: Page ranges to split PDFs of PARALLEL_MIN_PAGES pages or more into
+            ocr_language: Tesseract language code for scanned pages
+        
+        Returns:
+            List of (page_number, page_text) tuples, page numbers from 1; None if error
+        """
+        try:
+            ranges = await asyncio.to_thread(self._page_ranges, file_path, num_workers, ocr_language)
+            key = await asyncio.to_thread(_ocr_cache_key, file_path, ocr_language)
+            known = await asyncio.to_thread(get_cached_pdf_ocr_pages, key)
+            loop = asyncio.get_running_loop()
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(OCR_POOL, extract_page_range, *r, known) for r in ranges
+            ))
             
-            doc.close()
-            return text
+            return await asyncio.to_thread(self._join_parts, key, known, parts)
         
         except Exception as e:
             print(f"Error extracting PDF text: {str(e)}")
             return None
     
-    def chunk_text(self, text: str) -> List[Tuple[str, int]]:
+    def _page_ranges(self, file_path: str, num_workers: int, ocr_language: str) -> List[Tuple[str, int, int, str]]:
+        """extract_page_range arguments covering the PDF: one range, or num_workers for long PDFs."""
+        page_count = self.get_page_count(file_path)
+        if page_count is None:
+            raise ValueError(f"Cannot open {file_path}")
+        
+        workers = min(num_workers, page_count)
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            return [(file_path, 0, page_count, ocr_language)]
+        step = -(-page_count // workers)
+        return [
+            (file_path, start, min(start + step, page_count), ocr_language)
+            for start in range(0, page_count, step)
+        ]
+    
+    @staticmethod
+    def _join_parts(
+        key: str,
+        known: Dict[int, str],
+        parts: List[Tuple[List[str], Dict[int, str]]]
+    ) -> List[Tuple[int, str]]:
+        """Number the pages of extract_page_range results, caching any newly OCRed pages under key."""
+        pages = []
+        recognised = {}
+        for texts, new in parts:
+            pages.extend(texts)
+            recognised.update(new)
+        if recognised:
+            cache_pdf_ocr_pages(key, {**known, **recognised})
+        return list(enumerate(pages, start=1))
+    
+    def chunk_text(self, pages: List[Tuple[int, str]]) -> List[Tuple[str, int]]:
         """
-        Split text into overlapping chunks.
+        Split pages into overlapping chunks.
+        
+        Paragraphs are packed into a chunk until the next one would reach chunk_size;
+        the trailing paragraphs that fit within chunk_overlap characters are repeated
+        at the start of the next chunk. A chunk never runs past the end of its page,
+        so each one carries the page it came from (the overlap does cross pages).
         
         Args:
-            text: Text to chunk
+            pages: (page_number, page_text) tuples from extract_text_from_pdf
         
         Returns:
             List of (chunk_text, page_number) tuples
         """
         chunks = []
+        buf: List[str] = []
+        buf_len = 0
+        fresh = 0  # paragraphs in buf not already part of an emitted chunk
         
-        # Split by paragraphs first
-        paragraphs = text.split('\n\n')
-        current_chunk = ""
-        
-        for para in paragraphs:
-            if len(current_chunk) + len(para) < self.chunk_size:
-                current_chunk += para + "\n\n"
-            else:
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                current_chunk = para + "\n\n"
+        def flush(page_num: int):
+            nonlocal buf, buf_len, fresh
+            chunk = "\n\n".join(buf).strip()
+            if fresh and chunk:
+                chunks.append((chunk, page_num))
+            
+            # Carry whole trailing paragraphs, up to chunk_overlap characters
+            carry = len(buf)
+            carry_len = 0
+            while carry > 1 and carry_len + len(buf[carry - 1]) + 2 <= self.chunk_overlap:
+                carry -= 1
+                carry_len += len(buf[carry]) + 2
+            buf = buf[carry:]
+            buf_len = carry_len
+            fresh = 0
         
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        for page_num, page_text in pages:
+            # Walk the page's paragraphs in place; lengths include the "\n\n" separator
+            for m in _PARA.finditer(page_text):
+                para = m.group(0)
+                if buf_len + len(para) >= self.chunk_size:
+                    flush(page_num)
+                buf.append(para)
+                buf_len += len(para) + 2
+                fresh += 1
+            flush(page_num)
         
-        return [(chunk, 0) for chunk in chunks]  # page number is simplified
+        return chunks
     
     def process_pdf(
         self,
         file_path: str,
         user_id: str,
-        document_name: str = "Uploaded PDF"
+        document_name: str = "Uploaded PDF",
+        pages: Optional[List[Tuple[int, str]]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Process a PDF file and store in vector database.
@@ -89,34 +214,38 @@ class PDFService:
             file_path: Path to PDF file
             user_id: User ID for memory isolation
             document_name: Name/title of document
+            pages: Already extracted (page_number, page_text) tuples, if any
         
         Returns:
             Processing results with summary
         """
         try:
             # Extract text
-            text = self.extract_text_from_pdf(file_path)
-            if not text:
+            if pages is None:
+                pages = self.extract_text_from_pdf(file_path)
+            if not pages:
                 return {"error": "Could not extract text from PDF"}
             
             # Chunk text
-            chunks = self.chunk_text(text)
+            chunks = self.chunk_text(pages)
             
-            # Store in vector DB
+            # Store in vector DB, a batch of chunks per encode and INSERT
             stored_ids = []
-            for chunk_text, page_num in chunks:
-                memory_id = vector_store.add_memory(
+            for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+                batch = chunks[start:start + EMBED_BATCH_SIZE]
+                stored_ids.extend(vector_store.add_memories_batch(
                     user_id=user_id,
-                    text=chunk_text,
-                    memory_type="document",
-                    metadata={
-                        "document_name": document_name,
-                        "page_number": page_num,
-                        "source": "pdf",
-                    }
-                )
-                if memory_id:
-                    stored_ids.append(memory_id)
+                    texts=[chunk_text for chunk_text, _ in batch],
+                    metadatas=[
+                        {
+                            "document_name": document_name,
+                            "page_number": page_num,
+                            "source": "pdf",
+                        }
+                        for _, page_num in batch
+                    ],
+                    memory_type="document"
+                ))
             
             # Generate summary (first few chunks)
             summary_text = " ".join([c[0] for c in chunks[:3]])[:500]
@@ -126,7 +255,7 @@ class PDFService:
                 "document_name": document_name,
                 "chunks_created": len(chunks),
                 "chunks_stored": len(stored_ids),
-                "text_length": len(text),
+                "text_length": sum(len(page_text) for _, page_text in pages),
                 "summary": summary_text + "...",
             }
         
@@ -134,14 +263,37 @@ class PDFService:
             print(f"Error processing PDF: {str(e)}")
             return {"error": str(e)}
     
+    async def process_pdf_async(
+        self,
+        file_path: str,
+        user_id: str,
+        document_name: str = "Uploaded PDF"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        process_pdf without blocking the event loop.
+        
+        Text extraction runs in an OCR_POOL worker process; chunking, embedding and
+        storage run in a thread, since they need this process's model and connection.
+        
+        Args:
+            file_path: Path to PDF file
+            user_id: User ID for memory isolation
+            document_name: Name/title of document
+        
+        Returns:
+            Processing results with summary
+        """
+        pages = await self.extract_text_from_pdf_async(file_path)
+        if not pages:
+            return {"error": "Could not extract text from PDF"}
+        return await asyncio.to_thread(self.process_pdf, file_path, user_id, document_name, pages)
+    
     def get_page_count(self, file_path: str) -> Optional[int]:
-        """Get number of pages in PDF."""
+        """Get number of pages in PDF (cached until the file changes)."""
         try:
-            doc = fitz.open(file_path)
-            count = len(doc)
-            doc.close()
-            return count
-        except:
+            st = os.stat(file_path)
+            return _page_count(file_path, st.st_mtime_ns, st.st_size)
+        except Exception:
             return None
 
 
@@ -1,37 +1,195 @@
 """Lightweight web page fetch + clean text extraction with caching."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Union
+import asyncio
 import aiohttp
+import codecs
+import re
+import lxml.html
+from lxml import etree
 from bs4 import BeautifulSoup
+from cachetools import TTLCache
 from datetime import datetime
+from urllib.parse import urlparse
 import random
+import time
 
 from utils.cache import get_cached_page_content, cache_page_content
 from utils.config import config
 
+# Elements whose text is never page content (scripts, site chrome, widgets)
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "nav", "footer", "header",
+    "aside", "iframe", "svg", "form", "button",
+)
+
+# Where the main content lives, when the page marks it up; tried in document order
+MAIN_CONTENT_TAGS = ("article", "main")
+MAIN_CONTENT = etree.XPath(" | ".join(f"//{tag}" for tag in MAIN_CONTENT_TAGS))
+
+# Only the first 20000 characters of text are kept, so stop downloading well before
+# multi-megabyte pages finish
+MAX_HTML_BYTES = 256 * 1024
+READ_CHUNK_SIZE = 16 * 1024
+
+# <meta charset="..."> / <meta http-equiv=... content="...; charset=..."> near the top of a page
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+META_SNIFF_BYTES = 2048
+
+# Cleaned pages kept in-process for a while, in front of the shared Redis cache
+LOCAL_CACHE_SIZE = 1024
+LOCAL_CACHE_TTL = 600
+
+# After this many consecutive failures a host is skipped for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+# Hosts tracked at once, and how long a host's failure streak is remembered after
+# its last failure (longer than the cooldown, so an open breaker isn't forgotten)
+BREAKER_HOSTS = 1024
+BREAKER_MEMORY = 600
+
+# Pages rendered at once in the shared Playwright browser
+MAX_RENDER_PAGES = 4
+
+# Compressed transfer (br decoding needs the brotli package; aiohttp decodes both)
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip, br"}
+
+
+def _page_encoding(header_charset: Optional[str], body: bytes) -> str:
+    """Charset from the Content-Type header, else the page's <meta charset>, else UTF-8."""
+    match = META_CHARSET_RE.search(body, 0, META_SNIFF_BYTES)
+    for name in (header_charset, match and match.group(1).decode("ascii")):
+        if name:
+            try:
+                return codecs.lookup(name).name
+            except LookupError:
+                pass
+    return "utf-8"
+
+
+def _extract_lxml(html: Union[str, bytes]) -> Tuple[str, str]:
+    """Title and visible text via lxml's C parser (bytes: encoding taken from <meta charset>)."""
+    root = lxml.html.fromstring(html)
+    # Collect first, then drop: removing elements mid-iteration would skip their siblings
+    for el in list(root.iter(*BOILERPLATE_TAGS)):
+        el.drop_tree()
+    title = (root.findtext(".//title") or "").strip()
+    for content in MAIN_CONTENT(root)[:1] + [root]:
+        text = " ".join(s for s in (t.strip() for t in content.itertext()) if s)
+        if text:
+            break
+    return title, text
+
+
+def _extract_bs4(html: Union[str, bytes]) -> Tuple[str, str]:
+    """Pure-Python fallback for markup lxml rejects (e.g. str input with an XML encoding declaration)."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(BOILERPLATE_TAGS)):
+        tag.decompose()
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    content = soup.find(list(MAIN_CONTENT_TAGS))
+    text = " ".join(content.stripped_strings) if content else ""
+    return title, text or " ".join(soup.stripped_strings)
+
 
 class ScrapeService:
     """Fetch HTML pages, strip boilerplate, and cache cleaned text."""
 
     def __init__(self, timeout: int = 12):
         self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._local_cache: TTLCache = TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL)
+        # host -> (consecutive failures, monotonic time until which the host is skipped)
+        self._breaker: TTLCache = TTLCache(maxsize=BREAKER_HOSTS, ttl=BREAKER_MEMORY)
+        # Playwright driver, browser and context are launched once and shared by all renders
+        self._pw = None
+        self._browser = None
+        self._ctx = None
+        self._browser_lock = asyncio.Lock()
+        self._render_slots = asyncio.Semaphore(MAX_RENDER_PAGES)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Keep-alive session (pooled connections, cached DNS), created on first use inside the app's event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session and the Playwright browser (call on app shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        async with self._browser_lock:
+            await self._close_browser()
+
+    async def _close_browser(self):
+        """Tear down the shared browser; the caller holds _browser_lock."""
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+            if self._pw is not None:
+                await self._pw.stop()
+        except Exception as e:
+            print(f"Playwright shutdown error: {e}")
+        finally:
+            self._pw = self._browser = self._ctx = None
+
+    def _breaker_open(self, host: str) -> bool:
+        """True while the host is being skipped after repeated failures."""
+        return self._breaker.get(host, (0, 0.0))[1] > time.monotonic()
+
+    def _record_result(self, host: str, ok: bool):
+        """Reset the host's failure count on success; trip its breaker once failures reach the threshold."""
+        if ok:
+            self._breaker.pop(host, None)
+            return
+        failures = self._breaker.get(host, (0, 0.0))[0] + 1
+        open_until = time.monotonic() + BREAKER_COOLDOWN if failures >= BREAKER_THRESHOLD else 0.0
+        self._breaker[host] = (failures, open_until)
 
     async def fetch_and_parse(self, url: str, ttl_seconds: int = 21600) -> Optional[Dict[str, Any]]:
         """Fetch a URL, clean to text, cache, and return structured dict."""
         if not url:
             return None
 
+        cached = self._local_cache.get(url)
+        if cached:
+            return cached
+
         cached = get_cached_page_content(url)
         if cached:
+            self._local_cache[url] = cached
             return cached
 
+        host = urlparse(url).hostname or ""
+        if self._breaker_open(host):
+            return None
+
         html = None
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=self.timeout, headers={"User-Agent": "Mozilla/5.0"}) as resp:
-                    if resp.status != 200:
-                        return None
-                    html = await resp.text()
+            async with self.session.get(url, headers=REQUEST_HEADERS) as resp:
+                if resp.status != 200:
+                    # 4xx is the page's answer; only server errors count against the host
+                    self._record_result(host, resp.status < 500)
+                    return None
+                buf = bytearray()
+                async for chunk in resp.content.iter_chunked(READ_CHUNK_SIZE):
+                    buf += chunk
+                    if len(buf) >= MAX_HTML_BYTES:
+                        if resp.connection is not None:
+                            # Body still arriving: drop the connection instead of downloading the rest
+                            resp.close()
+                        else:
+                            # Whole (compressed) body already received and the connection pooled;
+                            # drain the decoded buffer, or the connection stays paused for reading
+                            await resp.content.read()
+                        break
+                html = buf.decode(_page_encoding(resp.charset, buf), errors="replace")
+            self._record_result(host, True)
         except Exception as e:
+            self._record_result(host, False)
             print(f"Scrape error for {url}: {e}")
 
         # Optional JS render (Playwright) for tough pages, limited by JS_RENDER_PERCENT
@@ -45,13 +203,12 @@ class ScrapeService:
             return None
 
         try:
-            soup = BeautifulSoup(html, "html.parser")
-            # Remove scripts/styles
-            for tag in soup(["script", "style", "noscript"]):
-                tag.decompose()
+            try:
+                title, text = _extract_lxml(html)
+            except (ValueError, etree.ParserError):
+                title, text = _extract_bs4(html)
 
-            title = (soup.title.string.strip() if soup.title and soup.title.string else "")[:200]
-            text = " ".join(soup.stripped_strings)
+            title = title[:200]
             # Trim very long pages to keep prompts lean
             text = text[:20000]
 
@@ -62,26 +219,44 @@ class ScrapeService:
                 "fetched_at": datetime.utcnow().isoformat() + "Z",
             }
             cache_page_content(url, result, ttl=ttl_seconds)
+            self._local_cache[url] = result
             return result
         except Exception as e:
             print(f"Parse error for {url}: {e}")
             return None
 
+    async def _ensure_browser(self):
+        """Launch Chromium on first use (or after it died) and return the shared browser context."""
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                await self._close_browser()
+            if self._ctx is None:
+                from playwright.async_api import async_playwright
+                self._pw = await async_playwright().start()
+                try:
+                    self._browser = await self._pw.chromium.launch(headless=True)
+                    self._ctx = await self._browser.new_context()
+                except Exception:
+                    await self._close_browser()
+                    raise
+            return self._ctx
+
     async def _render_with_playwright(self, url: str) -> Optional[str]:
-        """Render page with Playwright if available."""
+        """Render page with Playwright if available, in a new page of the shared browser."""
         try:
-            from playwright.async_api import async_playwright
+            import playwright.async_api  # noqa: F401
         except ImportError:
             return None
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto(url, wait_until="networkidle", timeout=config.PLAYWRIGHT_TIMEOUT * 1000)
-                content = await page.content()
-                await browser.close()
-                return content
+            async with self._render_slots:
+                ctx = await self._ensure_browser()
+                page = await ctx.new_page()
+                try:
+                    await page.goto(url, wait_until="networkidle", timeout=config.PLAYWRIGHT_TIMEOUT * 1000)
+                    return await page.content()
+                finally:
+                    await page.close()
         except Exception as e:
             print(f"Playwright render failed for {url}: {e}")
             return None
@@ -1,11 +1,84 @@
 """Multi-provider web search service supporting Serper, SerpApi, Brave, and DuckDuckGo."""
 from typing import List, Dict, Any, Optional
-import aiohttp
+import asyncio
+import weakref
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils.config import config
 from utils.cache import get_cached_search_results, cache_web_search_result
 from services.duckduckgo_search import duckduckgo_search
 
+# Seconds the paid API gets to answer before DuckDuckGo is queried alongside it
+PAID_HEAD_START = 0.8
+
+# Pooled keep-alive session for the synchronous provider calls, so repeated searches reuse
+# the TCP/TLS connection. Search requests (POST included) are read-only, so transient
+# failures are retried; after the last retry the response is returned, not raised
+_http = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False
+    )
+)
+_http.mount("https://", _adapter)
+_http.mount("http://", _adapter)
+
+
+def get_session() -> requests.Session:
+    """The shared requests session used for synchronous searches."""
+    return _http
+
+
+# How to call each paid provider and read its JSON. The API key goes in the
+# "key_header" header or the "key_param" parameter; "query" builds the JSON body
+# (POST) or query string (GET); "fields" maps our result keys to the provider's.
+PROVIDER_SPEC: Dict[str, Dict[str, Any]] = {
+    "serper": {
+        "label": "Serper API",
+        "method": "POST",
+        "url": "https://google.serper.dev/search",
+        "key_config": "SEARCH_API_KEY",
+        "key_header": "X-API-KEY",
+        "headers": {"Content-Type": "application/json"},
+        "query": lambda query, limit: {"q": query, "num": limit, "autocorrect": True, "page": 1},
+        "timeout": 5,
+        "results_path": ("organic",),
+        "fields": {"title": "title", "url": "link", "snippet": "snippet", "source": "source"},
+    },
+    "serpapi": {
+        "label": "SerpApi",
+        "method": "GET",
+        "url": "https://serpapi.com/search",
+        "key_config": "SERPAPI_KEY",
+        "key_param": "api_key",
+        "headers": {},
+        "query": lambda query, limit: {"q": query, "num": limit, "engine": "google"},
+        "timeout": 10,
+        "results_path": ("organic_results",),
+        "fields": {"title": "title", "url": "link", "snippet": "snippet", "source": "displayed_link"},
+    },
+    "brave": {
+        "label": "Brave API",
+        "method": "GET",
+        "url": "https://api.search.brave.com/res/v1/web/search",
+        "key_config": "BRAVE_API_KEY",
+        "key_header": "X-Subscription-Token",
+        "headers": {"Accept": "application/json"},
+        "query": lambda query, limit: {"q": query, "count": limit},
+        "timeout": 10,
+        "results_path": ("web", "results"),
+        "fields": {"title": "title", "url": "url", "snippet": "description", "source": "url"},
+    },
+}
+
 
 class MultiSearchService:
     """Service for multi-provider web search integration."""
@@ -19,18 +92,46 @@ class MultiSearchService:
         """
         self.provider = provider or config.SEARCH_PROVIDER
         
-        # Set API key and URL based on provider
-        if self.provider == "serper":
-            self.api_key = config.SEARCH_API_KEY
-            self.api_url = config.SEARCH_API_URL or "https://google.serper.dev/search"
-        elif self.provider == "serpapi":
-            self.api_key = config.SERPAPI_KEY
-            self.api_url = "https://serpapi.com/search"
-        elif self.provider == "brave":
-            self.api_key = config.BRAVE_API_KEY
-            self.api_url = "https://api.search.brave.com/res/v1/web/search"
-        else:
+        if self.provider not in PROVIDER_SPEC:
             raise ValueError(f"Unknown search provider: {self.provider}")
+        self.spec = PROVIDER_SPEC[self.provider]
+        self.api_key = getattr(config, self.spec["key_config"])
+        self.api_url = self.spec["url"]
+        if self.provider == "serper":
+            self.api_url = config.SEARCH_API_URL or self.api_url
+        
+        # Provider connections: HTTP/2 lets concurrent searches share one TLS connection;
+        # idle connections are kept for a minute so spaced-out searches skip the handshake
+        self.limits = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+        
+        # An AsyncClient's pooled connections belong to the event loop that opened them,
+        # so keep one client per loop (the app loop, plus the sports scheduler's loops)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Keep-alive AsyncClient for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # http2 and limits belong to the transport when one is passed explicitly
+            client = httpx.AsyncClient(
+                timeout=10.0,
+                transport=httpx.AsyncHTTPTransport(http2=True, limits=self.limits, retries=2)
+            )
+            self._clients[loop] = client
+        return client
+    
+    async def close(self):
+        """Close the current loop's AsyncClient (call on app shutdown)."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+    
+    async def aclose_loop_clients(self):
+        """Close this service's and DuckDuckGo's AsyncClients for the running loop (call before closing a short-lived loop)."""
+        await self.close()
+        await duckduckgo_search.aclose_loop_client()
     
     def search(self, query: str, limit: int = 5, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
@@ -53,12 +154,7 @@ class MultiSearchService:
         if self.api_key:
             try:
                 print(f"🔍 Using paid API: {self.provider} for: {query}")
-                if self.provider == "serper":
-                    result = self._search_serper(query, limit, ttl)
-                elif self.provider == "serpapi":
-                    result = self._search_serpapi(query, limit, ttl)
-                elif self.provider == "brave":
-                    result = self._search_brave(query, limit, ttl)
+                result = self._search_provider(query, limit, ttl)
                 
                 if result and result.get('results'):
                     print(f"✅ {self.provider} returned {len(result['results'])} results")
@@ -70,7 +166,7 @@ class MultiSearchService:
         
         # Fallback to DuckDuckGo (FREE, no API key needed)
         print(f"🦆 Using DuckDuckGo fallback search for: {query}")
-        ddg_results = duckduckgo_search.search(query, limit)
+        ddg_results = duckduckgo_search.search_sync(query, limit)
         if ddg_results and ddg_results.get('results'):
             print(f"✅ DuckDuckGo returned {len(ddg_results['results'])} results")
             # Cache the results
@@ -80,132 +176,49 @@ class MultiSearchService:
         print("⚠️ No search results from any provider")
         return {"results": [], "provider": "none"}
     
-    def _search_serper(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Search using Serper API."""
-        headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "q": query,
-            "num": limit,
-            "autocorrect": True,
-            "page": 1,
-        }
-        
-        response = requests.post(
-            self.api_url,
-            headers=headers,
-            json=payload,
-            timeout=5  # Reduced from 10 to 5 seconds
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            results = []
-            for result in data.get("organic", [])[:limit]:
-                results.append({
-                    "title": result.get("title"),
-                    "url": result.get("link"),
-                    "snippet": result.get("snippet"),
-                    "source": result.get("source"),
-                })
-            
-            cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-            
-            return {
-                "results": results,
-                "query": query,
-                "from_cache": False,
-                "provider": "serper"
-            }
+    def _request_kwargs(self, query: str, limit: int) -> Dict[str, Any]:
+        """Headers plus JSON body (POST) or query params (GET) for the provider's request."""
+        headers = dict(self.spec["headers"])
+        body = self.spec["query"](query, limit)
+        if "key_header" in self.spec:
+            headers[self.spec["key_header"]] = self.api_key
         else:
-            print(f"Serper API error: {response.status_code}")
-            return None
+            body[self.spec["key_param"]] = self.api_key
+        return {"headers": headers, "json" if self.spec["method"] == "POST" else "params": body}
     
-    def _search_serpapi(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Search using SerpApi."""
-        params = {
-            "q": query,
-            "api_key": self.api_key,
-            "num": limit,
-            "engine": "google"
-        }
+    def _parse_results(self, data: Dict[str, Any], query: str, limit: int, ttl: Optional[int] = None) -> Dict[str, Any]:
+        """Map the provider's JSON onto our result dicts and cache them."""
+        items = data
+        for key in self.spec["results_path"]:
+            items = (items or {}).get(key)
         
-        response = requests.get(
-            self.api_url,
-            params=params,
-            timeout=10
-        )
+        results = [
+            {field: item.get(source) for field, source in self.spec["fields"].items()}
+            for item in (items or [])[:limit]
+        ]
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            results = []
-            for result in data.get("organic_results", [])[:limit]:
-                results.append({
-                    "title": result.get("title"),
-                    "url": result.get("link"),
-                    "snippet": result.get("snippet"),
-                    "source": result.get("displayed_link"),
-                })
-            
-            cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-            
-            return {
-                "results": results,
-                "query": query,
-                "from_cache": False,
-                "provider": "serpapi"
-            }
-        else:
-            print(f"SerpApi error: {response.status_code}")
-            return None
-    
-    def _search_brave(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Search using Brave Search API."""
-        headers = {
-            "Accept": "application/json",
-            "X-Subscription-Token": self.api_key
-        }
+        cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
         
-        params = {
-            "q": query,
-            "count": limit
+        return {
+            "results": results,
+            "query": query,
+            "from_cache": False,
+            "provider": self.provider
         }
-        
-        response = requests.get(
+    
+    def _search_provider(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Search with the configured paid provider."""
+        response = get_session().request(
+            self.spec["method"],
             self.api_url,
-            headers=headers,
-            params=params,
-            timeout=10
+            timeout=self.spec["timeout"],
+            **self._request_kwargs(query, limit)
         )
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            results = []
-            for result in data.get("web", {}).get("results", [])[:limit]:
-                results.append({
-                    "title": result.get("title"),
-                    "url": result.get("url"),
-                    "snippet": result.get("description"),
-                    "source": result.get("url"),
-                })
-            
-            cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-            
-            return {
-                "results": results,
-                "query": query,
-                "from_cache": False,
-                "provider": "brave"
-            }
-        else:
-            print(f"Brave API error: {response.status_code}")
+        if response.status_code != 200:
+            print(f"{self.spec['label']} error: {response.status_code}")
             return None
+        return self._parse_results(response.json(), query, limit, ttl)
     
     async def async_search(self, query: str, limit: int = 5, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
@@ -221,10 +234,7 @@ class MultiSearchService:
         # If no paid API key is configured, fall back to DuckDuckGo (free) so search still works
         if not self.api_key:
             try:
-                # Use thread to avoid blocking event loop
-                import asyncio
-                loop = asyncio.get_running_loop()
-                ddg_results = await loop.run_in_executor(None, lambda: duckduckgo_search.search(query, limit))
+                ddg_results = await duckduckgo_search.search(query, limit)
                 if ddg_results and ddg_results.get("results"):
                     cache_web_search_result(query, ddg_results["results"], ttl or config.WEB_SEARCH_CACHE_TTL)
                     return ddg_results
@@ -237,146 +247,53 @@ class MultiSearchService:
         if cached:
             return {"results": cached, "from_cache": True}
         
+        # Paid API first; if it is slow or fails, race DuckDuckGo against it and take
+        # the first answer with results, cancelling the other
+        paid = asyncio.create_task(self._async_search_provider(query, limit, ttl))
+        ddg = None
+        pending = {paid}
         try:
-            if self.provider == "serper":
-                return await self._async_search_serper(query, limit, ttl)
-            elif self.provider == "serpapi":
-                return await self._async_search_serpapi(query, limit, ttl)
-            elif self.provider == "brave":
-                return await self._async_search_brave(query, limit, ttl)
-        
-        except Exception as e:
-            print(f"Error performing async web search: {str(e)}")
-            try:
-                import asyncio
-                loop = asyncio.get_running_loop()
-                ddg_results = await loop.run_in_executor(None, lambda: duckduckgo_search.search(query, limit))
-                if ddg_results and ddg_results.get("results"):
-                    cache_web_search_result(query, ddg_results["results"])
-                    return ddg_results
-            except Exception as fallback_error:
-                print(f"DuckDuckGo fallback error: {fallback_error}")
-            return None
-    
-    async def _async_search_serper(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Async search using Serper API."""
-        headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "q": query,
-            "num": limit,
-            "autocorrect": True,
-            "page": 1,
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.api_url, headers=headers, json=payload, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    results = []
-                    for result in data.get("organic", [])[:limit]:
-                        results.append({
-                            "title": result.get("title"),
-                            "url": result.get("link"),
-                            "snippet": result.get("snippet"),
-                            "source": result.get("source"),
-                        })
-                    
-                    cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-                    
-                    return {
-                        "results": results,
-                        "query": query,
-                        "from_cache": False,
-                        "provider": "serper"
-                    }
-                else:
-                    print(f"Serper API error: {response.status} - falling back to DuckDuckGo")
-                    # Fallback to DuckDuckGo
-                    import asyncio
-                    loop = asyncio.get_running_loop()
-                    ddg_results = await loop.run_in_executor(None, lambda: duckduckgo_search.search(query, limit))
-                    if ddg_results and ddg_results.get("results"):
-                        cache_web_search_result(query, ddg_results["results"], ttl or config.WEB_SEARCH_CACHE_TTL)
-                        return ddg_results
+            done, _ = await asyncio.wait(pending, timeout=PAID_HEAD_START)
+            while True:
+                for task in done:
+                    pending.discard(task)
+                    result = self._task_result(task)
+                    if result and result.get("results"):
+                        if task is ddg:
+                            cache_web_search_result(query, result["results"], ttl or config.WEB_SEARCH_CACHE_TTL)
+                        return result
+                if ddg is None:
+                    ddg = asyncio.create_task(duckduckgo_search.search(query, limit))
+                    pending.add(ddg)
+                if not pending:
                     return None
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the losers unwind (and release their connections) before returning
+            await asyncio.gather(*pending, return_exceptions=True)
     
-    async def _async_search_serpapi(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Async search using SerpApi."""
-        params = {
-            "q": query,
-            "api_key": self.api_key,
-            "num": limit,
-            "engine": "google"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.api_url, params=params, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    results = []
-                    for result in data.get("organic_results", [])[:limit]:
-                        results.append({
-                            "title": result.get("title"),
-                            "url": result.get("link"),
-                            "snippet": result.get("snippet"),
-                            "source": result.get("displayed_link"),
-                        })
-                    
-                    cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-                    
-                    return {
-                        "results": results,
-                        "query": query,
-                        "from_cache": False,
-                        "provider": "serpapi"
-                    }
-                else:
-                    print(f"SerpApi error: {response.status}")
-                    return None
+    async def _async_search_provider(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Async search with the configured paid provider."""
+        response = await self.client.request(
+            self.spec["method"],
+            self.api_url,
+            timeout=self.spec["timeout"],
+            **self._request_kwargs(query, limit)
+        )
+        if response.status_code != 200:
+            print(f"{self.spec['label']} error: {response.status_code}")
+            return None
+        return self._parse_results(response.json(), query, limit, ttl)
     
-    async def _async_search_brave(self, query: str, limit: int, ttl: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Async search using Brave Search API."""
-        headers = {
-            "Accept": "application/json",
-            "X-Subscription-Token": self.api_key
-        }
-        
-        params = {
-            "q": query,
-            "count": limit
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.api_url, headers=headers, params=params, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    results = []
-                    for result in data.get("web", {}).get("results", [])[:limit]:
-                        results.append({
-                            "title": result.get("title"),
-                            "url": result.get("url"),
-                            "snippet": result.get("description"),
-                            "source": result.get("url"),
-                        })
-                    
-                    cache_web_search_result(query, results, ttl or config.WEB_SEARCH_CACHE_TTL)
-                    
-                    return {
-                        "results": results,
-                        "query": query,
-                        "from_cache": False,
-                        "provider": "brave"
-                    }
-                else:
-                    print(f"Brave API error: {response.status}")
-                    return None
+    @staticmethod
+    def _task_result(task: asyncio.Task) -> Optional[Dict[str, Any]]:
+        """Result of a finished search task, or None if it raised."""
+        if task.exception() is not None:
+            print(f"Error performing async web search: {str(task.exception())}")
+            return None
+        return task.result()
     
     def format_search_results_for_context(self, results: List[Dict[str, Any]]) -> str:
         """Format search results into context for AI with numbered citations."""
@@ -59,6 +59,18 @@ class SportsDataScheduler:
             self.is_running = False
             logger.info("⏹️ Sports Data Scheduler stopped")
     
+    @staticmethod
+    def _search(query: str, limit: int) -> Optional[dict]:
+        """Run search_service.async_search on a short-lived loop, closing that loop's HTTP clients before it goes."""
+        async def run():
+            try:
+                return await search_service.async_search(query, limit=limit)
+            finally:
+                await search_service.aclose_loop_clients()
+        
+        # asyncio.run also cancels and awaits any tasks the search left behind, then closes the loop
+        return asyncio.run(run())
+    
     def fetch_upcoming_matches(self):
         """Fetch upcoming cricket/IPL matches from web and store in DB."""
         try:
@@ -73,10 +85,7 @@ class SportsDataScheduler:
             
             for query in search_queries:
                 try:
-                    # Using sync wrapper for async search
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    results = loop.run_until_complete(search_service.async_search(query, limit=3))
+                    results = self._search(query, limit=3)
                     
                     if results and results.get("results"):
                         for result in results["results"]:
@@ -161,9 +170,7 @@ class SportsDataScheduler:
             today = datetime.now().strftime("%Y-%m-%d")
             query = f"teer result today {today} Assam lottery"
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = loop.run_until_complete(search_service.async_search(query, limit=5))
+            results = self._search(query, limit=5)
             
             if results and results.get("results"):
                 # Parse first result for teer numbers
@@ -210,11 +217,7 @@ class SportsDataScheduler:
                         # Search for result
                         query = f"{match.get('team_1')} vs {match.get('team_2')} result"
                         
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        results = loop.run_until_complete(
-                            search_service.async_search(query, limit=1)
-                        )
+                        results = self._search(query, limit=1)
                         
                         if results and results.get("results"):
                             result_snippet = results["results"][0].get("snippet", "")
@@ -4,7 +4,7 @@ import json
 from typing import List, Dict, Optional, Any
 import psycopg2
 from psycopg2 import errors
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from pgvector.psycopg2 import register_vector
 from datetime import datetime
 
@@ -82,6 +82,18 @@ class VectorStoreService:
                 ON chat_vectors(user_id);
             """)
             
+            # Partial index for the hot memory_type='conversation' listing path,
+            # plus a composite index covering per-type filters on the other types
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS chat_vectors_user_conv_time_idx 
+                ON chat_vectors(user_id, created_at DESC)
+                WHERE type = 'conversation';
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS chat_vectors_user_type_time_idx 
+                ON chat_vectors(user_id, type, created_at DESC);
+            """)
+            
             # Create user profiles table to track preferences over time
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS user_profiles (
@@ -133,14 +145,14 @@ class VectorStoreService:
         except Exception as e:
             print(f"Warning: Could not create tables (may already exist): {e}")
 
-    def _ensure_tables_exist(self):
+    def ensure_tables_exist(self):
         """Best-effort ensure tables exist when operations fail."""
         try:
             self._create_tables()
         except Exception as e:
             print(f"Schema ensure failed: {e}")
 
-    def _embed_text_sync(self, text: str) -> Optional[List[float]]:
+    def _embed_text_sync(self, text: str):
         """
         Lightweight sync embedding helper so callers that don't pre-compute embeddings
         (legacy code paths) still work.
@@ -148,7 +160,8 @@ class VectorStoreService:
         try:
             if not text:
                 return None
-            return embedding_service.model.encode(text, convert_to_tensor=False).tolist()
+            # Through the embedding thread and disk cache; the float32 ndarray is adapted by register_vector
+            return embedding_service.embed_batch([text])[0]
         except Exception as e:
             print(f"Embedding failed: {e}")
             return None
@@ -185,7 +198,7 @@ class VectorStoreService:
         if not text:
             return None
 
-        emb = embedding or self._embed_text_sync(text)
+        emb = embedding if embedding is not None else self._embed_text_sync(text)
         if emb is None:
             return None
         
@@ -216,7 +229,7 @@ class VectorStoreService:
             print(f"Error adding memory: {e}")
             # If table missing, try to create and retry once
             if isinstance(e, errors.UndefinedTable):
-                self._ensure_tables_exist()
+                self.ensure_tables_exist()
                 try:
                     with self.conn.cursor() as cur:
                         cur.execute(
@@ -240,6 +253,65 @@ class VectorStoreService:
                     print(f"Retry add_memory failed: {e2}")
             return None
     
+    def add_memories_batch(
+        self,
+        user_id: str,
+        texts: List[str],
+        metadatas: List[Optional[Dict]],
+        memory_type: str = "conversation",
+        conversation_id: Optional[str] = None
+    ) -> List[int]:
+        """
+        Embed and insert many memories: one encode() for all texts, one INSERT for all rows.
+        
+        Args:
+            user_id: User identifier
+            texts: Text contents
+            metadatas: Metadata dict (or None) per text
+            memory_type: Type of memory (conversation, pdf, note, etc.)
+            conversation_id: Optional conversation ID shared by all rows
+        
+        Returns:
+            New memory IDs (empty on failure)
+        """
+        if not self.conn:
+            print("Database not connected, skipping memory storage")
+            return []
+        if not texts:
+            return []
+        
+        try:
+            embeddings = embedding_service.embed_batch(texts)
+        except Exception as e:
+            print(f"Embedding failed: {e}")
+            return []
+        
+        rows = [
+            (user_id, conversation_id, text, emb, json.dumps(metadata) if metadata else None, memory_type)
+            for text, emb, metadata in zip(texts, embeddings, metadatas)
+        ]
+        try:
+            self._ensure_connection()
+            
+            with self.conn.cursor() as cur:
+                inserted = execute_values(
+                    cur,
+                    """
+                    INSERT INTO chat_vectors 
+                    (user_id, conversation_id, content, embedding, metadata, type)
+                    VALUES %s
+                    RETURNING id
+                    """,
+                    rows,
+                    page_size=len(rows),
+                    fetch=True,
+                )
+                return [row[0] for row in inserted]
+        
+        except Exception as e:
+            print(f"Error adding memories: {e}")
+            return []
+    
     def search_similar(
         self,
         user_id: str,
@@ -306,7 +378,7 @@ class VectorStoreService:
         except Exception as e:
             print(f"Error searching vectors: {e}")
             if isinstance(e, errors.UndefinedTable):
-                self._ensure_tables_exist()
+                self.ensure_tables_exist()
             return []
 
     def update_memory(
@@ -327,7 +399,7 @@ class VectorStoreService:
         params: List[Any] = []
 
         if content is not None:
-            emb = embedding or self._embed_text_sync(content)
+            emb = embedding if embedding is not None else self._embed_text_sync(content)
             if emb is None:
                 return False
             fields.append("content = %s")
@@ -386,7 +458,7 @@ class VectorStoreService:
         """Add PDF content to vector database."""
         try:
             self._ensure_connection()
-            emb = embedding or self._embed_text_sync(content)
+            emb = embedding if embedding is not None else self._embed_text_sync(content)
             if emb is None:
                 return False
             
@@ -442,7 +514,7 @@ class VectorStoreService:
         except Exception as e:
             print(f"Error searching PDF content: {e}")
             if isinstance(e, errors.UndefinedTable):
-                self._ensure_tables_exist()
+                self.ensure_tables_exist()
                 return self.search_pdf_content(user_id, query_embedding, limit)
             return []
     
@@ -587,7 +659,7 @@ class VectorStoreService:
         except Exception as e:
             print(f"Error deleting user data: {e}")
             if isinstance(e, errors.UndefinedTable):
-                self._ensure_tables_exist()
+                self.ensure_tables_exist()
             return False
     
     def close(self):
@@ -3,7 +3,7 @@ import os
 import json
 from typing import List, Dict, Optional, Any
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from pgvector.psycopg2 import register_vector
 from datetime import datetime
 
@@ -132,6 +132,45 @@ class VectorStoreService:
             self.conn.rollback()
             return False
     
+    def add_memories_bulk(self, rows: List[tuple], page_size: int = 500) -> int:
+        """
+        Insert many memories in one round-trip per page.
+        
+        Args:
+            rows: Tuples of (user_id, conversation_id, content, embedding, metadata, memory_type)
+            page_size: Rows sent per INSERT statement
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        try:
+            self._ensure_connection()
+            
+            with self.conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO chat_vectors 
+                    (user_id, conversation_id, content, embedding, metadata, type)
+                    VALUES %s
+                    """,
+                    [
+                        (user_id, conversation_id, content, embedding,
+                         json.dumps(metadata) if metadata else None, memory_type)
+                        for user_id, conversation_id, content, embedding, metadata, memory_type in rows
+                    ],
+                    page_size=page_size,
+                )
+                self.conn.commit()
+                return len(rows)
+        
+        except Exception as e:
+            print(f"Error adding memories in bulk: {e}")
+            self.conn.rollback()
+            return 0
+    
     def search_similar(
         self,
         user_id: str,
@@ -16,16 +16,18 @@ except ImportError:
 class Cache:
     """Cache with Redis support and in-memory fallback."""
     
-    def __init__(self, default_ttl: int = 3600, prefix: str = "chatbot"):
+    def __init__(self, default_ttl: int = 3600, prefix: str = "chatbot", max_entries: Optional[int] = None):
         """
         Initialize cache with default TTL in seconds.
         
         Args:
             default_ttl: Default time-to-live in seconds
             prefix: Key prefix for namespacing
+            max_entries: Cap on the in-memory fallback; the oldest entries are evicted first
         """
         self.default_ttl = default_ttl
         self.prefix = prefix
+        self.max_entries = max_entries
         self.redis_client = None
         self.store: Dict[str, tuple] = {}  # Fallback: {key: (value, expiry_time)}
         
@@ -95,6 +97,10 @@ class Cache:
         
         # Fallback to memory
         expiry = time.time() + ttl
+        self.store.pop(full_key, None)
+        if self.max_entries:
+            while len(self.store) >= self.max_entries:
+                self.store.pop(next(iter(self.store)))
         self.store[full_key] = (value, expiry)
     
     def get_or_set(self, key: str, compute_func, ttl: Optional[int] = None) -> Any:
@@ -161,6 +167,7 @@ horoscope_cache = Cache(default_ttl=86400, prefix="horoscope")          # 24 hou
 sports_data_cache = Cache(default_ttl=3600, prefix="sports")            # 1 hour
 web_page_cache = Cache(default_ttl=21600, prefix="page")                # 6 hours default for scraped pages
 web_search_rate_limit_cache = Cache(default_ttl=86400, prefix="ws_rate") # 24 hours for rate limiting
+ocr_cache = Cache(default_ttl=30 * 86400, prefix="ocr", max_entries=1000)  # 30 days; keyed by image content
 
 
 def cache_query_response(user_id: str, query: str, response: str, ttl: int = 3600) -> None:
@@ -244,6 +251,7 @@ def clear_all_caches() -> None:
     horoscope_cache.clear()
     sports_data_cache.clear()
     web_page_cache.clear()
+    ocr_cache.clear()
 
 
 def get_cache_stats() -> Dict[str, Any]:
@@ -255,6 +263,7 @@ def get_cache_stats() -> Dict[str, Any]:
         "horoscope": horoscope_cache.get_stats(),
         "sports_data": sports_data_cache.get_stats(),
         "web_page": web_page_cache.get_stats(),
+        "ocr": ocr_cache.get_stats(),
     }
 
 # -------- Scraped page helpers --------
@@ -268,3 +277,25 @@ def get_cached_page_content(url: str) -> Optional[dict]:
     """Get cached cleaned page content."""
     key = web_page_cache._generate_key(url)
     return web_page_cache.get(key)
+
+# -------- OCR helpers --------
+def cache_ocr_text(key: str, text: str, ttl: int = 30 * 86400) -> None:
+    """Cache OCR output under a content-hash key (see ocr_service)."""
+    ocr_cache.set(key, text, ttl)
+
+
+def get_cached_ocr_text(key: str) -> Optional[str]:
+    """Get cached OCR output by content-hash key."""
+    return ocr_cache.get(key)
+
+
+def cache_pdf_ocr_pages(key: str, pages: Dict[int, str], ttl: int = 30 * 86400) -> None:
+    """Cache a PDF's scanned-page OCR output, {page index: text}, under a content-hash key (see pdf_service)."""
+    ocr_cache.set(key, pages, ttl)
+
+
+def get_cached_pdf_ocr_pages(key: str) -> Dict[int, str]:
+    """Get a PDF's cached scanned-page OCR output by content-hash key ({} if none)."""
+    cached = ocr_cache.get(key) or {}
+    # JSON object keys come back from Redis as strings
+    return {int(page): text for page, text in cached.items()}
@@ -173,6 +173,11 @@ You're MyDost - their friendly AI companion! 💙"""
     # Memory and context
     CONVERSATION_HISTORY_LIMIT = 50  # Keep last N messages in context (raised for better recall)
     MAX_RETRIEVAL_RESULTS = 25  # Number of vector DB results to retrieve
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "0"))  # 0 = auto (64 on GPU, 32 on CPU)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # torch, onnx (CPU only)
+    EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH", "./onnx_mpnet")  # exported on first use if missing
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./.emb_cache.sqlite3")  # empty disables the disk cache
+    EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
     CACHE_TTL_SECONDS = 3600  # Cache results for 1 hour
     
     # Analytics
@@ -0,0 +1,101 @@
+"""Persistent SQLite cache for embedding vectors, keyed by a hash of the input text."""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A hit only rewrites used_at once the stored value is this stale (seconds), so
+# reads stay read-only; eviction order is exact to within this interval
+TOUCH_INTERVAL = 3600
+
+
+class EmbeddingDiskCache:
+    """Content-addressed float32 vectors on disk, with oldest-used eviction past a size cap."""
+
+    def __init__(self, path: str, dimension: int, max_bytes: int, namespace: str = ""):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: SQLite file path
+            dimension: Embedding dimension (used to size the row cap)
+            max_bytes: Approximate upper bound on stored vector bytes
+            namespace: Mixed into every key (e.g. model name) so models never share entries
+        """
+        self.dimension = dimension
+        self.max_rows = max(1, max_bytes // (dimension * 4))
+        self.namespace = namespace.encode()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "hash BLOB PRIMARY KEY, vec BLOB NOT NULL, used_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at_idx ON embeddings(used_at)")
+        self.conn.commit()
+        # Running row count, kept by put_many so writes don't scan the table
+        (self._rows,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def key(self, text: str) -> bytes:
+        """16-byte BLAKE2b digest of namespace + text."""
+        return hashlib.blake2b(self.namespace + b"\0" + text.encode(), digest_size=16).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up several keys at once; missing keys are absent from the result."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT hash, vec, used_at FROM embeddings WHERE hash IN ({placeholders})", keys
+            ).fetchall()
+            stale = [(now, h) for h, _, used_at in rows if used_at < now - TOUCH_INTERVAL]
+            if stale:
+                self.conn.executemany("UPDATE embeddings SET used_at = ? WHERE hash = ?", stale)
+                self.conn.commit()
+        return {h: np.frombuffer(vec, dtype=np.float32) for h, vec, _ in rows}
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        """Store vectors as raw float32 bytes, evicting the least recently used rows past the cap."""
+        now = time.time()
+        rows = [(h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items]
+        if not rows:
+            return
+        with self._lock:
+            # A key already present holds the same vector (same namespace and text), so
+            # keep it; rowcount is then exactly the number of new rows
+            self._rows += self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?)", rows
+            ).rowcount
+            if self._rows > self.max_rows:
+                # Other processes may share the file: recount before evicting
+                (self._rows,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if self._rows > self.max_rows:
+                # Trim 10% below the cap so eviction doesn't run on every insert
+                excess = self._rows - int(self.max_rows * 0.9)
+                self._rows -= self.conn.execute(
+                    "DELETE FROM embeddings WHERE hash IN "
+                    "(SELECT hash FROM embeddings ORDER BY used_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+            self.conn.commit()
+
+
+def open_embedding_cache(path: str, dimension: int, max_mb: int, namespace: str = "") -> Optional[EmbeddingDiskCache]:
+    """Open the cache, or return None if disabled (empty path) or the file can't be opened."""
+    if not path:
+        return None
+    try:
+        return EmbeddingDiskCache(path, dimension, max_mb * 1024 * 1024, namespace)
+    except Exception as e:
+        logger.warning("Embedding cache disabled: cannot open %s: %s", path, e)
+        return None
@@ -0,0 +1,32 @@
+"""Logging setup that keeps handler I/O off request threads."""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def configure_logging(level: str = "INFO") -> QueueListener:
+    """
+    Route all log records through a queue drained by a background listener thread.
+    
+    Request handlers only enqueue records; formatting and the blocking stream
+    write happen on the listener thread.
+    
+    Args:
+        level: Root log level name (DEBUG, INFO, WARNING, ...)
+    
+    Returns:
+        The started QueueListener (stopped automatically at exit)
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.handlers = [QueueHandler(log_queue)]
+    
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener